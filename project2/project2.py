@@ -1,39 +1,129 @@
 import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
-import matplotlib.pyplot as plt
 import os
+import time
 
 class SimpleWatermark:
     """简单的水印嵌入和提取系统"""
     
+    # 分带处理时每带的起始行必须是该值的整数倍
+    BAND_ALIGN = 1
+    
     def __init__(self, watermark_size=32):
         self.watermark_size = watermark_size
     
-    def embed_watermark(self, image_path, watermark, output_path=None):
-        """嵌入水印到图像中"""
-        # 加载图像
-        img = Image.open(image_path)
-        img_array = np.array(img)
+    def to_bits(self, watermark):
+        """将水印转换为0/1组成的uint8数组，支持 '0101' 形式的字符串"""
+        if isinstance(watermark, str):
+            bits = np.frombuffer(watermark.encode('ascii'), dtype=np.uint8) - ord('0')
+        else:
+            bits = np.asarray(watermark)
         
         # 确保水印长度正确
-        if len(watermark) != self.watermark_size:
+        if bits.shape[-1] != self.watermark_size:
             raise ValueError(f"水印长度必须为{self.watermark_size}")
+        return bits.astype(np.uint8) & 1
+    
+    def embed_array(self, img_array, watermark):
+        """在图像数组中嵌入水印，返回新数组"""
+        return self.embed_band(img_array, self.to_bits(watermark), 0)
+    
+    def embed_band(self, band, bits, row_offset):
+        """在从第row_offset行开始的一带图像中嵌入水印，bits为to_bits的结果，返回新数组"""
+        band = np.array(band, copy=True)
+        start = row_offset * band.shape[1]
+        if start >= len(bits):
+            return band
+        
+        # 蓝色通道按行优先展开后的前n个像素，reshape对连续数组不复制
+        blue = band.reshape(-1, band.shape[-1])[:, 2]
+        n = min(len(bits) - start, blue.size)
+        # 清除最低位并设置水印位
+        blue[:n] = (blue[:n] & 0xFE) | bits[start:start + n]
+        return band
+    
+    def band_votes(self, band, row_offset):
+        """统计一带图像中各水印位的投票，返回 (取1的票数, 总票数)，各带结果相加后即可判决"""
+        ones = np.zeros(self.watermark_size, dtype=np.int64)
+        counts = np.zeros(self.watermark_size, dtype=np.int64)
+        start = row_offset * band.shape[1]
+        if start < self.watermark_size:
+            band = np.asarray(band)
+            blue = band.reshape(-1, band.shape[-1])[:self.watermark_size - start, 2]
+            ones[start:start + blue.size] = blue & 0x01
+            counts[start:start + blue.size] = 1
+        return ones, counts
+    
+    def band_rows(self, rows):
+        # 将每带行数调整为BAND_ALIGN的整数倍
+        return max(self.BAND_ALIGN, rows - rows % self.BAND_ALIGN)
+    
+    def embed_tiled(self, input_path, output_path, watermark, rows=1024, shape=None):
+        """分带嵌入水印，峰值内存只与带大小有关
+        
+        input_path为.npy文件、(H, W, C) 原始像素文件 (需给出shape) 或open_image_memmap返回的数组，
+        输出为.npy文件并以内存映射写入
+        """
+        bits = self.to_bits(watermark)
+        rows = self.band_rows(rows)
+        source = open_image_memmap(input_path, shape) if isinstance(input_path, str) else input_path
+        target = np.lib.format.open_memmap(output_path, mode='w+', dtype=source.dtype, shape=source.shape)
         
-        # 将水印转换为二进制序列
-        watermark_binary = np.array([int(bit) for bit in watermark])
+        for top in range(0, source.shape[0], rows):
+            target[top:top + rows] = self.embed_band(source[top:top + rows], bits, top)
+        target.flush()
+        del target
+        return output_path
+    
+    def extract_tiled(self, image_path, rows=1024, shape=None):
+        """分带提取水印，image_path的取值与embed_tiled的input_path相同"""
+        rows = self.band_rows(rows)
+        source = open_image_memmap(image_path, shape) if isinstance(image_path, str) else image_path
+        
+        ones = np.zeros(self.watermark_size, dtype=np.int64)
+        counts = np.zeros(self.watermark_size, dtype=np.int64)
+        for top in range(0, source.shape[0], rows):
+            band_ones, band_counts = self.band_votes(source[top:top + rows], top)
+            ones += band_ones
+            counts += band_counts
+        # 图像像素不足时剩余位补0
+        return (ones * 2 > counts).astype(np.int64)
+    
+    def extract_array(self, img_array):
+        """从图像数组中提取水印"""
+        img_array = np.asarray(img_array)
+        blue = img_array.reshape(-1, img_array.shape[-1])[:self.watermark_size, 2]
         
-        # 在图像的最低有效位中嵌入水印
-        # 使用图像的蓝色通道
-        blue_channel = img_array[:, :, 2].copy()
+        # 图像像素不足时剩余位补0
+        extracted_watermark = np.zeros(self.watermark_size, dtype=img_array.dtype)
+        extracted_watermark[:blue.size] = blue & 0x01
+        return extracted_watermark
+    
+    def embed_batch(self, images, watermarks):
+        """批量嵌入: images为 (N, H, W, C) 数组，watermarks为单个水印或 (N, 水印长度) 数组"""
+        images = np.array(images, copy=True)
+        bits = self.to_bits(watermarks)
         
-        # 将水印嵌入到蓝色通道的最低有效位
-        for i, bit in enumerate(watermark_binary):
-            if i < blue_channel.size:
-                # 清除最低位并设置水印位
-                blue_channel.flat[i] = (blue_channel.flat[i] & 0xFE) | bit
+        # (N, H*W, C) 视图中每张图像蓝色通道的前n个像素
+        blue = images.reshape(images.shape[0], -1, images.shape[-1])[:, :, 2]
+        n = min(self.watermark_size, blue.shape[1])
+        blue[:, :n] = (blue[:, :n] & 0xFE) | bits[..., :n]
+        return images
+    
+    def extract_batch(self, images):
+        """批量提取: 返回 (N, 水印长度) 数组"""
+        images = np.asarray(images)
+        blue = images.reshape(images.shape[0], -1, images.shape[-1])[:, :self.watermark_size, 2]
         
-        # 更新图像数组
-        img_array[:, :, 2] = blue_channel
+        extracted = np.zeros((images.shape[0], self.watermark_size), dtype=images.dtype)
+        extracted[:, :blue.shape[1]] = blue & 0x01
+        return extracted
+    
+    def embed_watermark(self, image_path, watermark, output_path=None):
+        """嵌入水印到图像中"""
+        # 加载图像
+        img = Image.open(image_path)
+        img_array = self.embed_array(np.array(img), watermark)
         
         # 创建新图像
         watermarked_img = Image.fromarray(img_array)
@@ -51,21 +141,7 @@ class SimpleWatermark:
         """从图像中提取水印"""
         # 加载图像
         img = Image.open(image_path)
-        img_array = np.array(img)
-        
-        # 从蓝色通道提取水印
-        blue_channel = img_array[:, :, 2]
-        
-        # 提取最低有效位
-        extracted_watermark = []
-        for i in range(self.watermark_size):
-            if i < blue_channel.size:
-                bit = blue_channel.flat[i] & 0x01
-                extracted_watermark.append(bit)
-            else:
-                extracted_watermark.append(0)
-        
-        return np.array(extracted_watermark)
+        return self.extract_array(np.array(img))
     
     def generate_random_watermark(self):
         """生成随机水印"""
@@ -79,6 +155,148 @@ class SimpleWatermark:
         correct_bits = np.sum(original_watermark == extracted_watermark)
         return correct_bits / len(original_watermark)
 
+def open_image_memmap(path, shape=None, dtype=np.uint8):
+    """以只读内存映射打开图像数组: .npy文件直接打开，其余视为按 (H, W, C) 排列的原始像素文件，需给出shape"""
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if shape is None:
+        raise ValueError("原始像素文件必须指定图像形状")
+    return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
+
+def dct_matrix(size=8):
+    """正交DCT-II变换矩阵，块变换为 D @ B @ D.T，逆变换为 D.T @ C @ D"""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.sqrt(2.0 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+class DCTWatermark(SimpleWatermark):
+    """基于8x8分块DCT中频系数的水印系统
+    
+    每个块通过一对对称的中频系数的大小关系携带一位水印，水印按块序号循环重复，
+    提取时对同一位的所有块投票。
+    """
+    
+    BLOCK = 8
+    BAND_ALIGN = BLOCK
+    
+    def __init__(self, watermark_size=32, strength=12.0, coefficients=((2, 3), (3, 2))):
+        super().__init__(watermark_size)
+        self.strength = strength
+        self.coefficients = coefficients
+        self.matrix = dct_matrix(self.BLOCK)
+    
+    def _crop(self, channels):
+        # 只处理能被8整除的部分，右侧和底部不足一块的像素保持不变
+        h = channels.shape[-2] // self.BLOCK * self.BLOCK
+        w = channels.shape[-1] // self.BLOCK * self.BLOCK
+        return channels[..., :h, :w]
+    
+    def _block_index(self, region, block_offset=0):
+        # 按行优先顺序，第k个块携带第 k % 水印长度 位，block_offset为区域第一个块的全局序号
+        bh = region.shape[-2] // self.BLOCK
+        bw = region.shape[-1] // self.BLOCK
+        return ((np.arange(bh * bw) + block_offset) % self.watermark_size).reshape(bh, bw)
+    
+    def _coefficients(self, region):
+        """一次计算 (..., H, W) 平面中所有块的两个中频系数，返回两个 (..., H/8, W/8) 数组
+        
+        系数 C[u, v] = D[u] @ B @ D[v]，先用一次矩阵乘法对所有块的行做变换，
+        再对列方向求加权和，不需要完整的二维DCT
+        """
+        (u1, v1), (u2, v2) = self.coefficients
+        shape = region.shape
+        bh, bw = shape[-2] // self.BLOCK, shape[-1] // self.BLOCK
+        columns = np.stack([self.matrix[v1], self.matrix[v2]], axis=1)
+        rows = region.reshape(shape[:-1] + (bw, self.BLOCK)).astype(np.float32) @ columns.astype(np.float32)
+        rows = rows.reshape(shape[:-2] + (bh, self.BLOCK, bw, 2))
+        c1 = self.matrix[u1].astype(np.float32) @ rows[..., 0]
+        c2 = self.matrix[u2].astype(np.float32) @ rows[..., 1]
+        return c1, c2
+    
+    def _basis(self, u, v):
+        # 系数(u, v)的基图像，逆变换中单个系数变化delta对应像素变化 delta * 基图像
+        return np.outer(self.matrix[u], self.matrix[v]).astype(np.float32)
+    
+    def _embed_channels(self, channels, bits, block_offset=0):
+        """channels: (..., H, W) 的uint8数组，bits: (水印长度,) 或 (..., 水印长度)"""
+        channels = np.array(channels, copy=True)
+        region = self._crop(channels)
+        c1, c2 = self._coefficients(region)
+        
+        # 位为1时要求 c1 - c2 >= strength，位为0时要求 c2 - c1 >= strength
+        sign = 2.0 * bits[..., self._block_index(region, block_offset)] - 1.0
+        weak = sign * (c1 - c2) < self.strength
+        mid = (c1 + c2) / 2
+        delta1 = np.where(weak, mid + sign * self.strength / 2 - c1, 0).astype(np.float32)
+        delta2 = np.where(weak, mid - sign * self.strength / 2 - c2, 0).astype(np.float32)
+        
+        # DCT是线性的，只需把两个系数的变化量通过基图像叠加回像素，未修改的块保持原样
+        (u1, v1), (u2, v2) = self.coefficients
+        shape = region.shape
+        blocks = region.reshape(shape[:-2] + (shape[-2] // self.BLOCK, self.BLOCK,
+                                              shape[-1] // self.BLOCK, self.BLOCK))
+        pixels = blocks.astype(np.float32)
+        pixels += delta1[..., :, None, :, None] * self._basis(u1, v1)[:, None, :]
+        pixels += delta2[..., :, None, :, None] * self._basis(u2, v2)[:, None, :]
+        np.rint(pixels, out=pixels)
+        np.clip(pixels, 0, 255, out=pixels)
+        blocks[...] = pixels
+        return channels
+    
+    def _votes(self, channels, block_offset=0):
+        region = self._crop(np.asarray(channels))
+        c1, c2 = self._coefficients(region)
+        ones = (c1 > c2).reshape(c1.shape[:-2] + (-1,))
+        
+        # 按位投票: 块的全局序号对水印长度取模，前后补齐后按 (轮数, 水印长度) 求和
+        counts = np.bincount(self._block_index(region, block_offset).ravel(), minlength=self.watermark_size)
+        before = block_offset % self.watermark_size
+        after = -(before + ones.shape[-1]) % self.watermark_size
+        ones = np.pad(ones, [(0, 0)] * (ones.ndim - 1) + [(before, after)])
+        votes = ones.reshape(ones.shape[:-1] + (-1, self.watermark_size)).sum(axis=-2)
+        return votes, counts
+    
+    def _extract_channels(self, channels):
+        # 块数不足时没有块的位补0
+        votes, counts = self._votes(channels)
+        return (votes * 2 > counts).astype(np.int64)
+    
+    def _band_block_offset(self, band, row_offset):
+        if row_offset % self.BLOCK:
+            raise ValueError(f"分带处理的起始行必须是{self.BLOCK}的整数倍")
+        return row_offset // self.BLOCK * (band.shape[1] // self.BLOCK)
+    
+    def embed_band(self, band, bits, row_offset):
+        """在从第row_offset行开始的一带图像中嵌入水印，返回新数组"""
+        block_offset = self._band_block_offset(band, row_offset)
+        band = np.array(band, copy=True)
+        band[..., 2] = self._embed_channels(band[..., 2], bits, block_offset)
+        return band
+    
+    def band_votes(self, band, row_offset):
+        """统计一带图像中各水印位的投票"""
+        return self._votes(np.asarray(band)[..., 2], self._band_block_offset(band, row_offset))
+    
+    def embed_array(self, img_array, watermark):
+        """在图像数组的蓝色通道中嵌入水印，返回新数组"""
+        img_array = np.array(img_array, copy=True)
+        img_array[..., 2] = self._embed_channels(img_array[..., 2], self.to_bits(watermark))
+        return img_array
+    
+    def extract_array(self, img_array):
+        """从图像数组中提取水印"""
+        return self._extract_channels(np.asarray(img_array)[..., 2])
+    
+    def embed_batch(self, images, watermarks):
+        """批量嵌入: images为 (N, H, W, C) 数组，所有图像的块在同一次变换中处理"""
+        return self.embed_array(images, watermarks)
+    
+    def extract_batch(self, images):
+        """批量提取: 返回 (N, 水印长度) 数组"""
+        return self.extract_array(images)
+
 def create_test_image():
     """创建测试图像"""
     # 创建一个简单的测试图像
@@ -88,50 +306,133 @@ def create_test_image():
     print("测试图像已创建: test_image.png")
     return 'test_image.png'
 
-def apply_attacks(image_path, attack_type):
-    """应用各种攻击"""
-    img = Image.open(image_path)
+# 攻击类型及其默认参数，参数含义: rotate为角度，crop为保留的边长比例，contrast为对比度系数，noise为噪声上限
+DEFAULT_ATTACK_PARAMS = {
+    'flip': None,
+    'rotate': 15,
+    'crop': 0.5,
+    'contrast': 2.0,
+    'noise': 50,
+    'blur': None,
+}
+
+# 参数扫描的默认取值
+DEFAULT_SWEEP = {
+    'flip': [None],
+    'rotate': [1, 5, 15, 30, 45, 90],
+    'crop': [0.9, 0.75, 0.5, 0.25],
+    'contrast': [0.5, 1.5, 2.0, 3.0],
+    'noise': [5, 10, 25, 50],
+    'blur': [None],
+}
+
+def attack_image(img, attack_type, param=None, rng=None):
+    """在内存中对PIL图像或数组应用攻击，返回PIL图像"""
+    if not isinstance(img, Image.Image):
+        img = Image.fromarray(np.asarray(img))
+    if param is None:
+        param = DEFAULT_ATTACK_PARAMS.get(attack_type)
     
     if attack_type == 'flip':
         # 水平翻转
-        attacked_img = img.transpose(Image.FLIP_LEFT_RIGHT)
-        output_path = 'attacked_flip.png'
+        return img.transpose(Image.FLIP_LEFT_RIGHT)
     elif attack_type == 'rotate':
         # 旋转
-        attacked_img = img.rotate(15)
-        output_path = 'attacked_rotate.png'
+        return img.rotate(param)
     elif attack_type == 'crop':
-        # 截取
+        # 截取中心区域
         width, height = img.size
-        left = width // 4
-        top = height // 4
-        right = 3 * width // 4
-        bottom = 3 * height // 4
-        attacked_img = img.crop((left, top, right, bottom))
-        output_path = 'attacked_crop.png'
+        left = int(width * (1 - param) / 2)
+        top = int(height * (1 - param) / 2)
+        right = left + max(1, int(width * param))
+        bottom = top + max(1, int(height * param))
+        return img.crop((left, top, right, bottom))
     elif attack_type == 'contrast':
         # 调整对比度
         enhancer = ImageEnhance.Contrast(img)
-        attacked_img = enhancer.enhance(2.0)
-        output_path = 'attacked_contrast.png'
+        return enhancer.enhance(param)
     elif attack_type == 'noise':
-        # 添加噪声
-        img_array = np.array(img)
-        noise = np.random.randint(0, 50, img_array.shape, dtype=np.uint8)
+        # 添加噪声，先转为int16再截断，避免uint8相加溢出回绕
+        rng = rng if rng is not None else np.random.default_rng()
+        img_array = np.asarray(img)
+        noise = rng.integers(0, param, img_array.shape, dtype=np.int16)
         attacked_array = np.clip(img_array + noise, 0, 255).astype(np.uint8)
-        attacked_img = Image.fromarray(attacked_array)
-        output_path = 'attacked_noise.png'
+        return Image.fromarray(attacked_array)
     elif attack_type == 'blur':
         # 模糊处理
-        attacked_img = img.filter(ImageFilter.BLUR)
-        output_path = 'attacked_blur.png'
+        return img.filter(ImageFilter.BLUR)
     else:
         raise ValueError(f"未知的攻击类型: {attack_type}")
-    
+
+def apply_attacks(image_path, attack_type):
+    """应用各种攻击并保存为 attacked_<类型>.png"""
+    attacked_img = attack_image(Image.open(image_path), attack_type)
+    output_path = f'attacked_{attack_type}.png'
     attacked_img.save(output_path)
     print(f"{attack_type}攻击已应用，保存为: {output_path}")
     return output_path
 
+_sweep_state = None
+
+def _init_sweep_worker(img_array, watermark, system):
+    """工作进程初始化: 图像和水印只传输一次"""
+    global _sweep_state
+    _sweep_state = (img_array, watermark, system)
+
+def _sweep_task(task):
+    attack_type, param, seed = task
+    img_array, watermark, system = _sweep_state
+    attacked = attack_image(img_array, attack_type, param, np.random.default_rng(seed))
+    extracted = system.extract_array(np.asarray(attacked))
+    return {
+        'attack': attack_type,
+        'param': param,
+        'accuracy': float(system.calculate_accuracy(watermark, extracted)),
+    }
+
+def run_attack_sweep(watermarked, watermark, sweep=None, workers=None, seed=0, system=None):
+    """对已嵌入水印的图像并行执行攻击参数扫描，返回每个组合的结果行
+    
+    system为提取水印使用的水印系统，默认为SimpleWatermark
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    sweep = DEFAULT_SWEEP if sweep is None else sweep
+    img_array = np.asarray(watermarked)
+    watermark = np.asarray(watermark)
+    system = system if system is not None else SimpleWatermark(len(watermark))
+    combos = [(attack_type, param) for attack_type, params in sweep.items() for param in params]
+    # 每个组合使用独立的种子，噪声攻击的结果可复现且与进程数无关
+    tasks = [(attack_type, param, seed + i) for i, (attack_type, param) in enumerate(combos)]
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_sweep_worker(img_array, watermark, system)
+        return [_sweep_task(task) for task in tasks]
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                             initargs=(img_array, watermark, system)) as executor:
+        chunksize = max(1, len(tasks) // (4 * workers))
+        return list(executor.map(_sweep_task, tasks, chunksize=chunksize))
+
+def format_results_table(rows):
+    """将扫描结果格式化为文本表格"""
+    lines = [f"{'攻击类型':<10}{'参数':>10}{'准确率':>10}"]
+    for row in rows:
+        param = '-' if row['param'] is None else str(row['param'])
+        lines.append(f"{row['attack']:<12}{param:>10}{row['accuracy']:>12.2%}")
+    return '\n'.join(lines)
+
+def save_results_csv(rows, path='attack_sweep_results.csv'):
+    """将扫描结果保存为CSV"""
+    import csv
+    
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['attack', 'param', 'accuracy'])
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
 def run_watermark_test():
     """运行水印测试"""
     print("=" * 50)
@@ -169,11 +470,11 @@ def run_watermark_test():
     for attack_type in attack_types:
         try:
             print(f"\n测试 {attack_type} 攻击...")
-            # 应用攻击
-            attacked_image_path = apply_attacks('watermarked_test_image.png', attack_type)
+            # 在内存中应用攻击，不写入磁盘
+            attacked_img = attack_image(watermarked_image, attack_type)
             
             # 从攻击后的图像提取水印
-            extracted_after_attack = watermark_system.extract_watermark(attacked_image_path)
+            extracted_after_attack = watermark_system.extract_array(np.asarray(attacked_img))
             
             # 计算准确率
             attack_accuracy = watermark_system.calculate_accuracy(original_watermark, extracted_after_attack)
@@ -185,13 +486,78 @@ def run_watermark_test():
             print(f"{attack_type}攻击测试失败: {e}")
             results[attack_type] = 0.0
     
+    # 参数扫描
+    print("\n4. 攻击参数扫描...")
+    sweep_rows = run_attack_sweep(watermarked_image, original_watermark)
+    print(format_results_table(sweep_rows))
+    print(f"扫描结果已保存为: {save_results_csv(sweep_rows)}")
+    
     # 绘制结果
     plot_results(results)
     
     return results
 
+def benchmark_throughput(systems=None, sizes=((512, 512), (2048, 2048)), repeat=3):
+    """测量各水印系统嵌入和提取的吞吐量 (MP/s)，取多次中最快的一次"""
+    if systems is None:
+        systems = {'lsb': SimpleWatermark(), 'dct': DCTWatermark()}
+    
+    rows = []
+    for height, width in sizes:
+        img_array = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+        megapixels = height * width / 1e6
+        for name, system in systems.items():
+            watermark = system.generate_random_watermark()
+            embed_times = []
+            extract_times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                watermarked = system.embed_array(img_array, watermark)
+                embed_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                system.extract_array(watermarked)
+                extract_times.append(time.perf_counter() - start)
+            rows.append({
+                'engine': name,
+                'size': f'{width}x{height}',
+                'embed_mpps': megapixels / min(embed_times),
+                'extract_mpps': megapixels / min(extract_times),
+            })
+    return rows
+
+def run_dct_test(test_image_path='test_image.png'):
+    """运行DCT频域水印测试，并与LSB水印对比吞吐量"""
+    print("\n" + "=" * 50)
+    print("DCT频域水印")
+    print("=" * 50)
+    
+    dct_system = DCTWatermark(watermark_size=32)
+    original_watermark = dct_system.generate_random_watermark()
+    print(f"原始水印: {original_watermark}")
+    
+    watermarked_image = dct_system.embed_watermark(test_image_path, original_watermark,
+                                                   'watermarked_dct_test_image.png')
+    extracted_watermark = dct_system.extract_watermark('watermarked_dct_test_image.png')
+    accuracy = dct_system.calculate_accuracy(original_watermark, extracted_watermark)
+    print(f"水印提取准确率: {accuracy:.2%}")
+    
+    print("\n攻击参数扫描...")
+    sweep_rows = run_attack_sweep(watermarked_image, original_watermark, system=dct_system)
+    print(format_results_table(sweep_rows))
+    print(f"扫描结果已保存为: {save_results_csv(sweep_rows, 'attack_sweep_results_dct.csv')}")
+    
+    print("\n吞吐量对比...")
+    print(f"{'引擎':<8}{'尺寸':>12}{'嵌入MP/s':>12}{'提取MP/s':>12}")
+    for row in benchmark_throughput():
+        print(f"{row['engine']:<10}{row['size']:>12}{row['embed_mpps']:>14.1f}{row['extract_mpps']:>14.1f}")
+    
+    return sweep_rows
+
 def plot_results(results):
     """绘制测试结果"""
+    # 仅绘图时才需要matplotlib，批处理的工作进程不必加载
+    import matplotlib.pyplot as plt
+    
     attack_names = list(results.keys())
     accuracies = list(results.values())
     
@@ -217,12 +583,15 @@ def plot_results(results):
 if __name__ == "__main__":
     try:
         results = run_watermark_test()
+        run_dct_test()
         print("\n" + "=" * 50)
         print("实验完成!")
         print("生成的文件:")
         print("- test_image.png: 测试图像")
         print("- watermarked_test_image.png: 嵌入水印后的图像")
-        print("- attacked_*.png: 各种攻击后的图像")
+        print("- attack_sweep_results.csv: 攻击参数扫描结果表")
+        print("- watermarked_dct_test_image.png: 嵌入DCT水印后的图像")
+        print("- attack_sweep_results_dct.csv: DCT水印的攻击参数扫描结果表")
         print("- robustness_results.png: 鲁棒性测试结果图")
         print("\n鲁棒性测试结果汇总:")
         for attack_type, accuracy in results.items():
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量水印流水线
+按目录或通配符收集图像，在进程池中并行完成 解码 -> 嵌入/提取 -> 编码
+同时在途的任务数有上限，内存占用不随图像数量增长，并统计各阶段吞吐量
+"""
+
+import argparse
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from project2 import DCTWatermark, SimpleWatermark
+
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.tif', '.tiff', '.jpg', '.jpeg')
+STAGES = ('decode', 'process', 'encode')
+ENGINES = {'lsb': SimpleWatermark, 'dct': DCTWatermark}
+
+_worker_system = None
+
+
+def collect_images(patterns):
+    """目录展开为其中的图像文件，其余参数按通配符匹配，结果去重并排序"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(os.path.join(pattern, name) for name in os.listdir(pattern)
+                         if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def output_paths(paths, output_dir):
+    """为每个输入生成PNG输出路径，保留相对于所有输入公共目录的子目录结构
+
+    扩展名不同的同名文件 (如 x.png 与 x.jpg) 仍会映射到同一输出，此时抛出ValueError
+    """
+    if not paths:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    outputs = []
+    seen = {}
+    for path in paths:
+        relative = os.path.relpath(os.path.abspath(path), root)
+        output_path = os.path.join(output_dir, os.path.splitext(relative)[0] + '.png')
+        if output_path in seen:
+            raise ValueError(f"输出文件冲突: {seen[output_path]} 与 {path} 都会写入 {output_path}")
+        seen[output_path] = path
+        outputs.append(output_path)
+    return outputs
+
+
+def _init_worker(engine, watermark_size):
+    global _worker_system
+    _worker_system = ENGINES[engine](watermark_size=watermark_size)
+
+
+def _load_array(path):
+    img = Image.open(path)
+    # 水印嵌入在蓝色通道，灰度、调色板等模式先转为RGB
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    return np.asarray(img)
+
+
+def _embed_file(path, output_path, watermark, compress_level):
+    timings = {}
+    start = time.perf_counter_ns()
+    img_array = _load_array(path)
+    timings['decode'] = time.perf_counter_ns() - start
+
+    start = time.perf_counter_ns()
+    watermarked = _worker_system.embed_array(img_array, watermark)
+    timings['process'] = time.perf_counter_ns() - start
+
+    # 输出统一为PNG，有损格式会破坏最低有效位
+    start = time.perf_counter_ns()
+    Image.fromarray(watermarked).save(output_path, format='PNG', compress_level=compress_level)
+    timings['encode'] = time.perf_counter_ns() - start
+    return {'path': path, 'output': output_path, 'pixels': img_array.shape[0] * img_array.shape[1],
+            'timings': timings}
+
+
+def _extract_file(path):
+    timings = {}
+    start = time.perf_counter_ns()
+    img_array = _load_array(path)
+    timings['decode'] = time.perf_counter_ns() - start
+
+    start = time.perf_counter_ns()
+    watermark = _worker_system.extract_array(img_array)
+    timings['process'] = time.perf_counter_ns() - start
+    return {'path': path, 'watermark': watermark, 'pixels': img_array.shape[0] * img_array.shape[1],
+            'timings': timings}
+
+
+class WatermarkPipeline:
+    """基于SimpleWatermark / DCTWatermark的并行批处理流水线"""
+
+    def __init__(self, watermark_size=32, workers=None, max_in_flight=None, compress_level=6, engine='lsb'):
+        if engine not in ENGINES:
+            raise ValueError(f"未知的水印引擎: {engine}")
+        self.engine = engine
+        self.watermark_size = watermark_size
+        self.workers = workers or os.cpu_count() or 1
+        # 同时提交到进程池的任务上限，默认每个进程两个，使解码、编码的I/O与计算重叠
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.compress_level = compress_level
+        self.system = ENGINES[engine](watermark_size=watermark_size)
+        self.stats = None
+
+    def _run(self, func, tasks):
+        self.stats = {'images': 0, 'pixels': 0, 'wall': 0}
+        self.stats.update({stage: 0 for stage in STAGES})
+        start = time.perf_counter_ns()
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.engine, self.watermark_size)) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(func, *task))
+                if len(pending) >= self.max_in_flight:
+                    yield self._record(pending.popleft().result())
+            while pending:
+                yield self._record(pending.popleft().result())
+
+        self.stats['wall'] = time.perf_counter_ns() - start
+
+    def _record(self, result):
+        self.stats['images'] += 1
+        self.stats['pixels'] += result['pixels']
+        for stage, elapsed in result['timings'].items():
+            self.stats[stage] += elapsed
+        return result
+
+    def embed_files(self, paths, output_dir, watermark):
+        """为每个输入图像嵌入水印，结果以PNG写入output_dir下对应的相对路径，逐个产出处理结果"""
+        watermark = self.system.to_bits(watermark)
+        paths = list(paths)
+        # 提交任何任务之前检查输出冲突，不会写出一半后才失败
+        outputs = output_paths(paths, output_dir)
+        for directory in {os.path.dirname(output_path) for output_path in outputs} | {output_dir}:
+            os.makedirs(directory, exist_ok=True)
+        tasks = ((path, output_path, watermark, self.compress_level) for path, output_path in zip(paths, outputs))
+        return self._run(_embed_file, tasks)
+
+    def extract_files(self, paths):
+        """从每个图像中提取水印，逐个产出包含 watermark 的处理结果"""
+        return self._run(_extract_file, ((path,) for path in paths))
+
+    def throughput(self):
+        """各阶段吞吐量: 阶段耗时为所有进程累计的时间(ns)，wall为整体墙钟时间"""
+        report = {}
+        for stage in STAGES + ('wall',):
+            elapsed = self.stats[stage]
+            if not elapsed:
+                continue
+            seconds = elapsed / 1e9
+            report[stage] = {
+                'seconds': seconds,
+                'images_per_sec': self.stats['images'] / seconds,
+                'mpixels_per_sec': self.stats['pixels'] / 1e6 / seconds,
+            }
+        return report
+
+
+def print_throughput(report):
+    print(f"{'阶段':<10}{'耗时(s)':>12}{'图像/s':>12}{'MP/s':>12}")
+    for stage, r in report.items():
+        print(f"{stage:<10}{r['seconds']:>12.3f}{r['images_per_sec']:>12.1f}{r['mpixels_per_sec']:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量水印嵌入与提取')
+    parser.add_argument('mode', choices=['embed', 'extract'])
+    parser.add_argument('inputs', nargs='+', help='图像目录或通配符，如 images/ 或 "data/*.png"')
+    parser.add_argument('--output-dir', default='watermarked', help='嵌入结果的输出目录')
+    parser.add_argument('--watermark', help='由0/1组成的水印字符串，嵌入时缺省则随机生成')
+    parser.add_argument('--watermark-size', type=int, default=32)
+    parser.add_argument('--engine', choices=list(ENGINES), default='lsb', help='lsb: 最低有效位，dct: 分块DCT中频系数')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-in-flight', type=int, default=None)
+    parser.add_argument('--compress-level', type=int, default=6, help='PNG压缩等级 0-9，越小编码越快')
+    args = parser.parse_args()
+
+    paths = collect_images(args.inputs)
+    if not paths:
+        print("未找到图像文件")
+        return
+
+    pipeline = WatermarkPipeline(args.watermark_size, args.workers, args.max_in_flight, args.compress_level,
+                                 args.engine)
+    watermark = args.watermark
+    if watermark is not None:
+        watermark = pipeline.system.to_bits(watermark)
+
+    if args.mode == 'embed':
+        if watermark is None:
+            watermark = pipeline.system.generate_random_watermark()
+        try:
+            results = pipeline.embed_files(paths, args.output_dir, watermark)
+        except ValueError as e:
+            print(e)
+            return
+        print(f"水印: {''.join(map(str, watermark))}")
+        for result in results:
+            print(f"{result['path']} -> {result['output']}")
+    else:
+        for result in pipeline.extract_files(paths):
+            line = f"{result['path']}: {''.join(map(str, result['watermark']))}"
+            if watermark is not None:
+                accuracy = pipeline.system.calculate_accuracy(watermark, result['watermark'])
+                line += f" 准确率 {accuracy:.2%}"
+            print(line)
+
+    print(f"\n共处理 {pipeline.stats['images']} 张图像，使用 {pipeline.workers} 个进程")
+    print_throughput(pipeline.throughput())
+
+
+if __name__ == "__main__":
+    main()
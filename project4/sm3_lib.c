@@ -0,0 +1,129 @@
+// SM3增量哈希的C接口，编译为动态库后供Python通过ctypes调用
+// 编译: gcc -O3 -shared -fPIC -o libsm3.so sm3_lib.c
+
+#include <stdint.h>
+#include <string.h>
+
+typedef struct {
+    uint32_t state[8];
+    uint8_t buffer[64];
+    uint64_t total_len;
+    size_t buffer_len;
+} sm3_ctx;
+
+static const uint32_t IV[8] = {
+    0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
+    0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E
+};
+
+static inline uint32_t rotl(uint32_t x, int n) {
+    n &= 31;
+    return n ? (x << n) | (x >> (32 - n)) : x;
+}
+
+static inline uint32_t P0(uint32_t x) {
+    return x ^ rotl(x, 9) ^ rotl(x, 17);
+}
+
+static inline uint32_t P1(uint32_t x) {
+    return x ^ rotl(x, 15) ^ rotl(x, 23);
+}
+
+static void compress(uint32_t* state, const uint8_t* block) {
+    uint32_t W[68];
+    uint32_t W1[64];
+
+    // 按大端序读入消息字
+    for (int i = 0; i < 16; i++) {
+        W[i] = ((uint32_t)block[i * 4] << 24) | ((uint32_t)block[i * 4 + 1] << 16) |
+               ((uint32_t)block[i * 4 + 2] << 8) | (uint32_t)block[i * 4 + 3];
+    }
+    for (int i = 16; i < 68; i++) {
+        W[i] = P1(W[i - 16] ^ W[i - 9] ^ rotl(W[i - 3], 15)) ^ rotl(W[i - 13], 7) ^ W[i - 6];
+    }
+    for (int i = 0; i < 64; i++) {
+        W1[i] = W[i] ^ W[i + 4];
+    }
+
+    uint32_t A = state[0], B = state[1], C = state[2], D = state[3];
+    uint32_t E = state[4], F = state[5], G = state[6], H = state[7];
+
+    for (int j = 0; j < 64; j++) {
+        uint32_t T = j < 16 ? 0x79CC4519 : 0x7A879D8A;
+        uint32_t SS1 = rotl(rotl(A, 12) + E + rotl(T, j), 7);
+        uint32_t SS2 = SS1 ^ rotl(A, 12);
+        uint32_t FF = j < 16 ? (A ^ B ^ C) : ((A & B) | (A & C) | (B & C));
+        uint32_t GG = j < 16 ? (E ^ F ^ G) : ((E & F) | (~E & G));
+        uint32_t TT1 = FF + D + SS2 + W1[j];
+        uint32_t TT2 = GG + H + SS1 + W[j];
+        D = C;
+        C = rotl(B, 9);
+        B = A;
+        A = TT1;
+        H = G;
+        G = rotl(F, 19);
+        F = E;
+        E = P0(TT2);
+    }
+
+    state[0] ^= A; state[1] ^= B; state[2] ^= C; state[3] ^= D;
+    state[4] ^= E; state[5] ^= F; state[6] ^= G; state[7] ^= H;
+}
+
+size_t sm3_ctx_size(void) {
+    return sizeof(sm3_ctx);
+}
+
+void sm3_init(sm3_ctx* ctx) {
+    memcpy(ctx->state, IV, sizeof(IV));
+    ctx->total_len = 0;
+    ctx->buffer_len = 0;
+}
+
+void sm3_update(sm3_ctx* ctx, const uint8_t* data, size_t len) {
+    ctx->total_len += len;
+    if (ctx->buffer_len) {
+        size_t fill = 64 - ctx->buffer_len;
+        if (len < fill) {
+            memcpy(ctx->buffer + ctx->buffer_len, data, len);
+            ctx->buffer_len += len;
+            return;
+        }
+        memcpy(ctx->buffer + ctx->buffer_len, data, fill);
+        compress(ctx->state, ctx->buffer);
+        data += fill;
+        len -= fill;
+        ctx->buffer_len = 0;
+    }
+    while (len >= 64) {
+        compress(ctx->state, data);
+        data += 64;
+        len -= 64;
+    }
+    memcpy(ctx->buffer, data, len);
+    ctx->buffer_len = len;
+}
+
+void sm3_final(sm3_ctx* ctx, uint8_t* out) {
+    uint64_t bit_len = ctx->total_len * 8;
+    uint8_t pad[72] = {0x80};
+    size_t pad_len = (ctx->buffer_len < 56 ? 56 : 120) - ctx->buffer_len;
+    for (int i = 0; i < 8; i++) {
+        pad[pad_len + i] = (uint8_t)(bit_len >> (56 - i * 8));
+    }
+    sm3_update(ctx, pad, pad_len + 8);
+
+    for (int i = 0; i < 8; i++) {
+        out[i * 4] = (uint8_t)(ctx->state[i] >> 24);
+        out[i * 4 + 1] = (uint8_t)(ctx->state[i] >> 16);
+        out[i * 4 + 2] = (uint8_t)(ctx->state[i] >> 8);
+        out[i * 4 + 3] = (uint8_t)ctx->state[i];
+    }
+}
+
+void sm3_hash(const uint8_t* data, size_t len, uint8_t* out) {
+    sm3_ctx ctx;
+    sm3_init(&ctx);
+    sm3_update(&ctx, data, len);
+    sm3_final(&ctx, out);
+}
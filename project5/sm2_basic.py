@@ -35,6 +35,14 @@ class SM2Basic:
         y3 = (lam * (x1 - x3) - y1) % self.p
         return (x3, y3)
 
+    def is_on_curve(self, P):
+        if P is None or len(P) != 2:
+            return False
+        x, y = P
+        if not (0 <= x < self.p and 0 <= y < self.p):
+            return False
+        return (y * y - (x * x * x + self.a * x + self.b)) % self.p == 0
+
     def scalar_multiply(self, k, P):
         result = None
         addend = P
@@ -74,6 +82,8 @@ class SM2Basic:
         return C1, C2, C3
 
     def decrypt(self, C1, C2, C3, private_key):
+        if not self.is_on_curve(C1):
+            return None
         dC1 = self.scalar_multiply(private_key, C1)
         t = self.kdf(dC1[0].to_bytes(32, 'big') + dC1[1].to_bytes(32, 'big'), len(C2))
         if not any(t):
@@ -105,6 +115,8 @@ class SM2Basic:
         r, s = signature
         if not (1 <= r < self.n and 1 <= s < self.n):
             return False
+        if not self.is_on_curve(public_key):
+            return False
 
         e = int.from_bytes(hashlib.sha256(message).digest(), 'big')
         t = (r + s) % self.n
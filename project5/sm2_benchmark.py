@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SM2性能基准测试
+对比各实现的密钥生成、签名、验签、加密、解密以及批量接口，输出JSON报告和对比图
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from sm2_basic import SM2Basic
+from sm2_improved import SM2Improved
+
+# 参与对比的实现，新增引擎时在这里注册
+ENGINES = {
+    'basic': lambda: SM2Basic(),
+    'improved-affine': lambda: SM2Improved(engine='affine'),
+    'improved': lambda: SM2Improved(),
+    'improved-sm3': lambda: SM2Improved(hash_name='sm3'),
+    'improved-ladder': lambda: SM2Improved(constant_time=True),
+}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func, warmup, repeat, items=1):
+    """先预热再重复计时，items为每次调用处理的条数，用于计算吞吐量"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+
+    # 峰值内存单独测一次，避免tracemalloc拖慢计时
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean = sum(samples) / len(samples)
+    return {
+        'repeat': repeat,
+        'items': items,
+        'mean_ns': mean,
+        'min_ns': samples[0],
+        'p50_ns': percentile(samples, 50),
+        'p90_ns': percentile(samples, 90),
+        'p99_ns': percentile(samples, 99),
+        'max_ns': samples[-1],
+        'ops_per_sec': items * 1e9 / mean if mean else 0.0,
+        'peak_memory_bytes': peak,
+    }
+
+
+def benchmark_engine(sm2, sizes, batch_sizes, warmup, repeat):
+    results = {}
+    private_key, public_key = sm2.generate_keypair()
+    results['keygen'] = measure(sm2.generate_keypair, warmup, repeat)
+
+    message = random.randbytes(32)
+    signature = sm2.sign(message, private_key, public_key)
+    results['sign'] = measure(lambda: sm2.sign(message, private_key, public_key), warmup, repeat)
+    results['verify'] = measure(lambda: sm2.verify(message, signature, public_key), warmup, repeat)
+
+    for size in sizes:
+        plaintext = random.randbytes(size)
+        C1, C2, C3 = sm2.encrypt(plaintext, public_key)
+        results[f'encrypt/{size}B'] = measure(lambda: sm2.encrypt(plaintext, public_key), warmup, repeat)
+        results[f'decrypt/{size}B'] = measure(lambda: sm2.decrypt(C1, C2, C3, private_key), warmup, repeat)
+
+    # 只有实现了批量接口的引擎才测试批量操作
+    if hasattr(sm2, 'batch_encrypt'):
+        batch_repeat = max(1, repeat // 4)
+        for count in batch_sizes:
+            messages = [random.randbytes(sizes[0]) for _ in range(count)]
+            ciphertexts = sm2.batch_encrypt(messages, public_key, workers=1)
+            items = [(msg, sm2.sign(msg, private_key, public_key), public_key) for msg in messages]
+            results[f'batch_encrypt/{count}'] = measure(
+                lambda: sm2.batch_encrypt(messages, public_key, workers=1), 1, batch_repeat, count)
+            results[f'batch_decrypt/{count}'] = measure(
+                lambda: sm2.batch_decrypt(ciphertexts, private_key, workers=1), 1, batch_repeat, count)
+            results[f'batch_verify/{count}'] = measure(
+                lambda: sm2.batch_verify(items, workers=1), 1, batch_repeat, count)
+    return results
+
+
+def environment_info(seed):
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+    }
+
+
+def run_benchmarks(engines, sizes, batch_sizes, warmup, repeat, seed):
+    report = {'environment': environment_info(seed), 'results': {}}
+    for name in engines:
+        print(f"测试 {name} ...")
+        # 密钥和消息都取自random，每个引擎前重新设置种子，各引擎使用相同的输入
+        random.seed(seed)
+        report['results'][name] = benchmark_engine(ENGINES[name](), sizes, batch_sizes, warmup, repeat)
+    return report
+
+
+def print_report(report):
+    for name, results in report['results'].items():
+        print(f"\n[{name}]")
+        print(f"{'操作':<22}{'p50':>12}{'p90':>12}{'p99':>12}{'ops/s':>12}{'峰值内存':>12}")
+        for op, r in results.items():
+            print(f"{op:<22}{r['p50_ns'] / 1e3:>10.1f}us{r['p90_ns'] / 1e3:>10.1f}us"
+                  f"{r['p99_ns'] / 1e3:>10.1f}us{r['ops_per_sec']:>12.1f}{r['peak_memory_bytes'] / 1024:>10.1f}KB")
+
+
+def compare_reports(report, baseline, threshold):
+    """与基线报告比较p50，变慢超过threshold比例的项视为性能回退"""
+    regressions = []
+    for name, results in report['results'].items():
+        for op, r in results.items():
+            old = baseline.get('results', {}).get(name, {}).get(op)
+            if not old or not old['p50_ns']:
+                continue
+            ratio = r['p50_ns'] / old['p50_ns']
+            if ratio > 1 + threshold:
+                regressions.append((name, op, old['p50_ns'], r['p50_ns'], ratio))
+    return regressions
+
+
+def plot_report(report, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("未安装matplotlib，跳过绘图")
+        return False
+
+    names = list(report['results'])
+    ops = [op for op in report['results'][names[0]] if '/' not in op or op.startswith(('encrypt', 'decrypt'))]
+    width = 0.8 / len(names)
+
+    plt.figure(figsize=(12, 6))
+    for i, name in enumerate(names):
+        results = report['results'][name]
+        values = [results[op]['p50_ns'] / 1e6 if op in results else 0 for op in ops]
+        positions = [j + i * width for j in range(len(ops))]
+        plt.bar(positions, values, width=width, label=name, alpha=0.8)
+
+    plt.xticks([j + width * (len(names) - 1) / 2 for j in range(len(ops))], ops, rotation=45)
+    plt.yscale('log')
+    plt.title('SM2各实现性能对比 (p50)')
+    plt.xlabel('操作')
+    plt.ylabel('耗时 (ms, 对数坐标)')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=150, bbox_inches='tight')
+    plt.close()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SM2性能基准测试')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[32, 1024, 65536], help='加解密消息长度(字节)')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[16, 128], help='批量操作的条数')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--chart', default='性能对比图.png')
+    parser.add_argument('--baseline', help='用于检测性能回退的基线JSON报告')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50变慢超过该比例视为回退')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.engines, args.sizes, args.batch_sizes, args.warmup, args.repeat, args.seed)
+    print_report(report)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存为: {args.output}")
+    if args.chart and plot_report(report, args.chart):
+        print(f"对比图已保存为: {args.chart}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.threshold)
+        for name, op, old, new, ratio in regressions:
+            print(f"✗ 性能回退: {name} {op} p50 {old / 1e3:.1f}us -> {new / 1e3:.1f}us ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("✓ 未发现性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SM2密文与签名的二进制编码
+密文支持 C1||C3||C2 (GB/T 32918 现行顺序) 与 C1||C2||C3 (旧顺序)，C1可使用压缩点
+解码基于memoryview，C2、C3直接引用输入缓冲区，不复制数据
+"""
+
+import struct
+
+ORDERS = ('C1C3C2', 'C1C2C3')
+# 批量打包时每条记录前的长度前缀 (4字节大端)
+RECORD_HEADER = struct.Struct('>I')
+
+
+class SM2Codec:
+    """SM2密文、签名的编码器和解码器"""
+
+    def __init__(self, sm2, order='C1C3C2', compressed=False):
+        if order not in ORDERS:
+            raise ValueError(f"未知的密文顺序: {order}")
+        self.sm2 = sm2
+        self.order = order
+        self.compressed = compressed
+        self.digest_size = sm2.hash_func().digest_size
+
+    def point_length(self, prefix):
+        if prefix == 4:
+            return 65
+        if prefix in (2, 3):
+            return 33
+        raise ValueError(f"无效的点编码前缀: {prefix}")
+
+    def encode_ciphertext(self, C1, C2, C3):
+        point = self.sm2.encode_point(C1, self.compressed)
+        if self.order == 'C1C3C2':
+            return b''.join((point, C3, C2))
+        return b''.join((point, C2, C3))
+
+    def decode_ciphertext(self, data):
+        # 返回 (C1, C2, C3)，其中C2、C3为输入缓冲区的memoryview切片
+        view = memoryview(data)
+        if not len(view):
+            raise ValueError("密文为空")
+        point_len = self.point_length(view[0])
+        if len(view) < point_len + self.digest_size:
+            raise ValueError("密文长度不足")
+
+        C1 = self.sm2.decode_point(view[:point_len])
+        if self.order == 'C1C3C2':
+            C3 = view[point_len:point_len + self.digest_size]
+            C2 = view[point_len + self.digest_size:]
+        else:
+            C2 = view[point_len:len(view) - self.digest_size]
+            C3 = view[len(view) - self.digest_size:]
+        return C1, C2, C3
+
+    def encode_signature(self, signature):
+        r, s = signature
+        return r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+
+    def decode_signature(self, data):
+        view = memoryview(data)
+        if len(view) != 64:
+            raise ValueError("签名长度必须为64字节")
+        return int.from_bytes(view[:32], 'big'), int.from_bytes(view[32:], 'big')
+
+    def pack_ciphertexts(self, ciphertexts):
+        # 多条密文打包到一个缓冲区: [长度][密文][长度][密文]...
+        buffer = bytearray()
+        for C1, C2, C3 in ciphertexts:
+            record = self.encode_ciphertext(C1, C2, C3)
+            buffer += RECORD_HEADER.pack(len(record))
+            buffer += record
+        return bytes(buffer)
+
+    def iter_ciphertexts(self, buffer):
+        # buffer可以是bytes、bytearray或mmap，逐条产出 (C1, C2, C3)，C2、C3不复制
+        view = memoryview(buffer)
+        offset = 0
+        while offset < len(view):
+            if offset + RECORD_HEADER.size > len(view):
+                raise ValueError("密文记录头不完整")
+            (length,) = RECORD_HEADER.unpack_from(view, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > len(view):
+                raise ValueError("密文记录不完整")
+            yield self.decode_ciphertext(view[offset:offset + length])
+            offset += length
+
+    def pack_signatures(self, signatures):
+        return b''.join(self.encode_signature(signature) for signature in signatures)
+
+    def iter_signatures(self, buffer):
+        view = memoryview(buffer)
+        if len(view) % 64:
+            raise ValueError("签名缓冲区长度必须为64的整数倍")
+        for offset in range(0, len(view), 64):
+            yield self.decode_signature(view[offset:offset + 64])
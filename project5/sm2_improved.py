@@ -2,11 +2,164 @@
 # -*- coding: utf-8 -*-
 
 import hashlib
+import io
+import mmap
+import os
 import random
+import struct
+import sys
+import tempfile
+import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sm2_codec import SM2Codec
+from sm3 import get_hash
+
+# 基点G的固定基预计算表，按窗口宽度缓存，每个进程只构建一次
+_BASE_TABLES = {}
+_BASE_TABLE_MAGIC = b'SM2G'
+# 窗口宽度1字节 + 窗口数2字节，base_window=1时有256个窗口
+_BASE_TABLE_HEADER = struct.Struct('>BH')
+# 验签时 s·G 的wNAF奇数倍点表 (G 与 2^128·G 两张)，同样每个进程只构建一次
+_SHAMIR_G_TABLES = {}
+_SHAMIR_G_WINDOW = 8
+_SHAMIR_SPLIT = 128
+# 流式加解密默认的分块大小
+STREAM_CHUNK_SIZE = 1 << 20
+# GB/T 32918 规定的默认用户标识
+DEFAULT_USER_ID = b'1234567812345678'
+
+
+def xor_bytes(data, key):
+    # 整块按大整数异或，避免逐字节的Python循环
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(len(data), 'big')
+
+
+def iter_chunks(source, chunk_size=STREAM_CHUNK_SIZE):
+    # 支持文件对象、bytes类对象以及产出bytes的可迭代对象
+    if hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for i in range(0, len(view), chunk_size):
+            yield view[i:i + chunk_size]
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+
+class KDFStream:
+    """按需增量产生KDF密钥流，不保留已经使用过的部分"""
+
+    def __init__(self, Z, hash_func=hashlib.sha256):
+        self.Z = Z
+        self.hash_func = hash_func
+        self.ct = 1
+        self.buffer = b''
+
+    def read(self, size):
+        blocks = [self.buffer]
+        have = len(self.buffer)
+        while have < size:
+            block = self.hash_func(self.Z + self.ct.to_bytes(4, 'big')).digest()
+            self.ct += 1
+            blocks.append(block)
+            have += len(block)
+        data = b''.join(blocks)
+        self.buffer = data[size:]
+        return data[:size]
+
+
+class LRUCache:
+    """按条目数和字节数双重限制的LRU缓存，加锁后可在多个线程间共享 (如NoncePool的后台线程)"""
+
+    def __init__(self, max_entries=128, max_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.data = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        # 查找与move_to_end之间条目可能被其他线程淘汰，两步在同一把锁内完成
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self.data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self.lock:
+            old = self.data.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self.data[key] = (value, size)
+            self.current_bytes += size
+            while len(self.data) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, old_size) = self.data.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.data),
+                'bytes': self.current_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self):
+        return len(self.data)
+
 
 class SM2Improved:
-    def __init__(self):
+    def __init__(self, engine='jacobian', fixed_base=True, base_window=5, base_table_path=None,
+                 window=5, cache_entries=128, cache_bytes=4 * 1024 * 1024, hash_name='sha256',
+                 constant_time=False):
+        if engine not in ('affine', 'jacobian'):
+            raise ValueError(f"未知的点运算引擎: {engine}")
+        if not 1 <= base_window <= 8:
+            raise ValueError(f"固定基窗口宽度必须在1到8之间: {base_window}")
+        if not 2 <= window <= 8:
+            raise ValueError(f"wNAF窗口宽度必须在2到8之间: {window}")
+        # 构造参数，用于在工作进程中重建相同配置的实例
+        self.options = {
+            'engine': engine, 'fixed_base': fixed_base, 'base_window': base_window,
+            'base_table_path': base_table_path, 'window': window,
+            'cache_entries': cache_entries, 'cache_bytes': cache_bytes, 'hash_name': hash_name,
+            'constant_time': constant_time,
+        }
+        self.engine = engine
+        self.fixed_base = fixed_base
+        self.base_window = base_window
+        self.base_table_path = base_table_path
+        self.window = window
+        # 为True时涉及秘密标量 (私钥、随机数k) 的乘法改用运算次数固定的Montgomery阶梯
+        self.constant_time = constant_time
+        # KDF、C3、签名摘要以及Z_A统一使用的哈希构造函数
+        self.hash_func = get_hash(hash_name)
         self.p = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFF
         self.a = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFC
         self.b = 0x28E9FA9E9D9F5E344D5A9E4BCF6509A7F39789F515AB8F92DDBCBD414D940E93
@@ -14,9 +167,13 @@ class SM2Improved:
         self.Gx = 0x32C4AE2C1F1981195F9904466A39C9948FE30BBFF2660BE1715A4589334C74C7
         self.Gy = 0xBC3736A2F4F6779C59BDCEE36B692153D0A9877CC62A474002DF32E52139F0A0
         self.G = (self.Gx, self.Gy)
-        
-        self.point_cache = {}
-        self.scalar_cache = {}
+
+        # 按公钥缓存窗口预计算表，对同一对端的重复加密/验签生效
+        self.table_cache = LRUCache(cache_entries, cache_bytes)
+        # 按编码缓存解压后的公钥，热点对端不必每次重新开平方
+        self.key_cache = LRUCache(cache_entries, cache_bytes)
+        # 按 (用户标识, 公钥) 缓存Z_A，避免每次签名都重新哈希曲线参数
+        self.za_cache = LRUCache(cache_entries, cache_bytes)
 
     def add_points(self, P1, P2):
         if P1 is None:
@@ -39,11 +196,188 @@ class SM2Improved:
         y3 = (lam * (x1 - x3) - y1) % self.p
         return (x3, y3)
 
-    def scalar_multiply(self, k, P):
-        cache_key = (k, P)
-        if cache_key in self.scalar_cache:
-            return self.scalar_cache[cache_key]
+    def sqrt_mod_p(self, value):
+        # SM2的 p ≡ 3 (mod 4)，平方根为 value^((p+1)/4)，不存在时返回None
+        root = pow(value, (self.p + 1) // 4, self.p)
+        if root * root % self.p != value % self.p:
+            return None
+        return root
+
+    def encode_point(self, P, compressed=False):
+        x = P[0].to_bytes(32, 'big')
+        if compressed:
+            return bytes([2 | (P[1] & 1)]) + x
+        return b'\x04' + x + P[1].to_bytes(32, 'big')
+
+    def decode_point(self, data):
+        # 支持 04||x||y 非压缩格式和 02/03||x 压缩格式
+        data = memoryview(data)
+        prefix = data[0] if len(data) else None
+        if prefix == 4 and len(data) == 65:
+            return (int.from_bytes(data[1:33], 'big'), int.from_bytes(data[33:65], 'big'))
+        if prefix in (2, 3) and len(data) == 33:
+            x = int.from_bytes(data[1:33], 'big')
+            if x >= self.p:
+                raise ValueError("点的x坐标超出范围")
+            y = self.sqrt_mod_p((x * x * x + self.a * x + self.b) % self.p)
+            if y is None:
+                raise ValueError("x坐标不对应曲线上的点")
+            if (y & 1) != (prefix & 1):
+                y = self.p - y
+            return (x, y)
+        raise ValueError("无效的点编码")
 
+    def is_on_curve(self, P):
+        if P is None or len(P) != 2:
+            return False
+        x, y = P
+        if not (0 <= x < self.p and 0 <= y < self.p):
+            return False
+        return (y * y - (x * x * x + self.a * x + self.b)) % self.p == 0
+
+    def load_point(self, key, cache=True):
+        # 接受 (x, y) 元组或点编码，校验点在曲线上，防止无效曲线攻击
+        if isinstance(key, (bytes, bytearray, memoryview)):
+            data = bytes(key)
+            if cache:
+                P = self.key_cache.get(data)
+                if P is not None:
+                    return P
+            P = self.decode_point(data)
+            if not self.is_on_curve(P):
+                raise ValueError("点不在曲线上")
+            if cache:
+                self.key_cache.put(data, P, sys.getsizeof(data) + 3 * sys.getsizeof(P[0]))
+            return P
+        if not self.is_on_curve(key):
+            raise ValueError("点不在曲线上")
+        return tuple(key)
+
+    # Jacobian坐标 (X, Y, Z) 表示仿射点 (X/Z^2, Y/Z^3)，None表示无穷远点
+    def to_jacobian(self, P):
+        if P is None:
+            return None
+        return (P[0], P[1], 1)
+
+    def to_affine(self, P):
+        if P is None:
+            return None
+        X, Y, Z = P
+        z_inv = pow(Z, -1, self.p)
+        z_inv2 = z_inv * z_inv % self.p
+        return (X * z_inv2 % self.p, Y * z_inv2 * z_inv % self.p)
+
+    def batch_to_affine(self, points):
+        # Montgomery同时求逆: n个点只做一次模逆和约3n次模乘
+        p = self.p
+        prefix = []
+        acc = 1
+        for P in points:
+            if P is not None:
+                acc = acc * P[2] % p
+            prefix.append(acc)
+
+        inv = pow(acc, -1, p)
+        result = [None] * len(points)
+        for i in range(len(points) - 1, -1, -1):
+            P = points[i]
+            if P is None:
+                continue
+            X, Y, Z = P
+            z_inv = inv * (prefix[i - 1] if i > 0 else 1) % p
+            inv = inv * Z % p
+            z_inv2 = z_inv * z_inv % p
+            result[i] = (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
+        return result
+
+    def jacobian_double(self, P):
+        if P is None:
+            return None
+        X1, Y1, Z1 = P
+        if Y1 == 0:
+            return None
+
+        # SM2曲线 a = -3，使用 dbl-2001-b 公式
+        p = self.p
+        delta = Z1 * Z1 % p
+        gamma = Y1 * Y1 % p
+        beta = X1 * gamma % p
+        alpha = 3 * (X1 - delta) * (X1 + delta) % p
+        X3 = (alpha * alpha - 8 * beta) % p
+        Z3 = ((Y1 + Z1) * (Y1 + Z1) - gamma - delta) % p
+        Y3 = (alpha * (4 * beta - X3) - 8 * gamma * gamma) % p
+        return (X3, Y3, Z3)
+
+    def jacobian_add(self, P1, P2):
+        if P1 is None:
+            return P2
+        if P2 is None:
+            return P1
+
+        p = self.p
+        X1, Y1, Z1 = P1
+        X2, Y2, Z2 = P2
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        U2 = X2 * Z1Z1 % p
+        S1 = Y1 * Z2 * Z2Z2 % p
+        S2 = Y2 * Z1 * Z1Z1 % p
+        H = (U2 - U1) % p
+        r = (S2 - S1) % p
+        if H == 0:
+            if r == 0:
+                return self.jacobian_double(P1)
+            return None
+
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (r * r - HHH - 2 * V) % p
+        Y3 = (r * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * Z2 * H % p
+        return (X3, Y3, Z3)
+
+    def jacobian_add_affine(self, P1, P2):
+        # 混合加法: P1为Jacobian坐标，P2为仿射坐标 (Z2 = 1)
+        if P2 is None:
+            return P1
+        if P1 is None:
+            return self.to_jacobian(P2)
+
+        p = self.p
+        X1, Y1, Z1 = P1
+        x2, y2 = P2
+        Z1Z1 = Z1 * Z1 % p
+        U2 = x2 * Z1Z1 % p
+        S2 = y2 * Z1 * Z1Z1 % p
+        H = (U2 - X1) % p
+        r = (S2 - Y1) % p
+        if H == 0:
+            if r == 0:
+                return self.jacobian_double(P1)
+            return None
+
+        HH = H * H % p
+        HHH = H * HH % p
+        V = X1 * HH % p
+        X3 = (r * r - HHH - 2 * V) % p
+        Y3 = (r * (V - X3) - Y1 * HHH) % p
+        Z3 = Z1 * H % p
+        return (X3, Y3, Z3)
+
+    def scalar_multiply_jacobian(self, k, P):
+        # 从高位到低位的倍点-加法，全程不做模逆，结果保持Jacobian坐标
+        if P is None or k == 0:
+            return None
+        result = None
+        for bit in bin(k)[2:]:
+            result = self.jacobian_double(result)
+            if bit == '1':
+                result = self.jacobian_add_affine(result, P)
+        return result
+
+    def scalar_multiply_affine(self, k, P):
         result = None
         addend = P
         while k:
@@ -51,101 +385,806 @@ class SM2Improved:
                 result = self.add_points(result, addend)
             addend = self.add_points(addend, addend)
             k >>= 1
+        return result
+
+    def build_base_table(self):
+        # table[i][j-1] = j * 2^(w*i) * G，j = 1 .. 2^w - 1
+        w = self.base_window
+        windows = (self.n.bit_length() + w - 1) // w
+        row_size = (1 << w) - 1
+        points = []
+        base = self.to_jacobian(self.G)
+        for _ in range(windows):
+            point = None
+            for _ in range(row_size):
+                point = self.jacobian_add(point, base)
+                points.append(point)
+            for _ in range(w):
+                base = self.jacobian_double(base)
 
-        self.scalar_cache[cache_key] = result
+        # 全表统一做一次批量求逆转换为仿射坐标
+        points = self.batch_to_affine(points)
+        return [points[i:i + row_size] for i in range(0, len(points), row_size)]
+
+    def save_base_table(self, path):
+        table = self.get_base_table()
+        with open(path, 'wb') as f:
+            f.write(_BASE_TABLE_MAGIC + _BASE_TABLE_HEADER.pack(self.base_window, len(table)))
+            for row in table:
+                for x, y in row:
+                    f.write(x.to_bytes(32, 'big') + y.to_bytes(32, 'big'))
+
+    def load_base_table(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != _BASE_TABLE_MAGIC:
+            raise ValueError(f"不是有效的基点预计算表文件: {path}")
+        offset = len(_BASE_TABLE_MAGIC) + _BASE_TABLE_HEADER.size
+        if len(data) < offset:
+            raise ValueError(f"基点预计算表文件不完整: {path}")
+        w, windows = _BASE_TABLE_HEADER.unpack_from(data, len(_BASE_TABLE_MAGIC))
+        row_size = (1 << w) - 1
+        if w != self.base_window or len(data) != offset + windows * row_size * 64:
+            raise ValueError(f"基点预计算表参数不匹配: {path}")
+
+        table = []
+        for _ in range(windows):
+            row = []
+            for _ in range(row_size):
+                x = int.from_bytes(data[offset:offset + 32], 'big')
+                y = int.from_bytes(data[offset + 32:offset + 64], 'big')
+                row.append((x, y))
+                offset += 64
+            table.append(row)
+        if table[0][0] != self.G:
+            raise ValueError(f"基点预计算表与曲线参数不一致: {path}")
+        return table
+
+    def get_base_table(self):
+        table = _BASE_TABLES.get(self.base_window)
+        if table is None:
+            if self.base_table_path and os.path.exists(self.base_table_path):
+                table = self.load_base_table(self.base_table_path)
+            else:
+                table = self.build_base_table()
+            _BASE_TABLES[self.base_window] = table
+        return table
+
+    def fixed_base_multiply(self, k):
+        # 按w位分窗查表，只需约 256/w 次混合加法，无倍点运算
+        table = self.get_base_table()
+        w = self.base_window
+        mask = (1 << w) - 1
+        k %= self.n
+        result = None
+        i = 0
+        while k:
+            digit = k & mask
+            if digit:
+                result = self.jacobian_add_affine(result, table[i][digit - 1])
+            k >>= w
+            i += 1
         return result
 
+    def negate(self, P):
+        if P is None:
+            return None
+        return (P[0], (-P[1]) % self.p)
+
+    def wnaf(self, k, w=None):
+        # 宽度为w的NAF表示，低位在前，非零位为奇数且 |d| < 2^(w-1)
+        if w is None:
+            w = self.window
+        full = 1 << w
+        half = 1 << (w - 1)
+        digits = []
+        while k:
+            if k & 1:
+                d = k & (full - 1)
+                if d >= half:
+                    d -= full
+                k -= d
+            else:
+                d = 0
+            digits.append(d)
+            k >>= 1
+        return digits
+
+    def window_table(self, P, cache=True, w=None):
+        # wNAF奇数倍点表: table[i] = (2i+1) * P，i = 0 .. 2^(w-2) - 1
+        if w is None:
+            w = self.window
+        key = (P, w)
+        if cache:
+            table = self.table_cache.get(key)
+            if table is not None:
+                return table
+
+        points = []
+        point = self.to_jacobian(P)
+        P2 = self.jacobian_double(point)
+        for _ in range((1 << (w - 2)) - 1):
+            point = self.jacobian_add(point, P2)
+            points.append(point)
+        table = [P] + self.batch_to_affine(points)
+        if cache:
+            size = sys.getsizeof(table) + sum(
+                sys.getsizeof(pt) + sys.getsizeof(pt[0]) + sys.getsizeof(pt[1]) for pt in table)
+            self.table_cache.put(key, table, size)
+        return table
+
+    def window_multiply(self, k, P, cache=True, w=None):
+        # wNAF变基标量乘法: 约 256 次倍点 + 256/(w+1) 次加法，负数位直接取负点
+        if P is None or k == 0:
+            return None
+        if w is None:
+            w = self.window
+        table = self.window_table(P, cache, w)
+        result = None
+        for d in reversed(self.wnaf(k, w)):
+            result = self.jacobian_double(result)
+            if d > 0:
+                result = self.jacobian_add_affine(result, table[d >> 1])
+            elif d < 0:
+                result = self.jacobian_add_affine(result, self.negate(table[-d >> 1]))
+        return result
+
+    def split_tables(self, P, w, cache=True):
+        # P 与 2^128·P 的奇数倍点表，标量拆成两个128位半长后可共用一半的倍点
+        key = (P, w, 'split')
+        if cache:
+            tables = self.table_cache.get(key)
+            if tables is not None:
+                return tables
+
+        point = self.to_jacobian(P)
+        for _ in range(_SHAMIR_SPLIT):
+            point = self.jacobian_double(point)
+        high = self.to_affine(point)
+        tables = (self.window_table(P, False, w), self.window_table(high, False, w) if high else None)
+        if cache:
+            size = sys.getsizeof(tables) + sum(
+                sys.getsizeof(table) + sum(
+                    sys.getsizeof(pt) + sys.getsizeof(pt[0]) + sys.getsizeof(pt[1]) for pt in table)
+                for table in tables if table)
+            self.table_cache.put(key, tables, size)
+        return tables
+
+    def shamir_base_tables(self):
+        tables = _SHAMIR_G_TABLES.get(_SHAMIR_G_WINDOW)
+        if tables is None:
+            tables = self.split_tables(self.G, _SHAMIR_G_WINDOW, cache=False)
+            _SHAMIR_G_TABLES[_SHAMIR_G_WINDOW] = tables
+        return tables
+
+    def warm_up(self):
+        # 提前构建进程级的基点预计算表，避免首次调用时的延迟
+        if self.engine == 'jacobian':
+            if self.fixed_base:
+                self.get_base_table()
+            self.shamir_base_tables()
+
+    def shamir_multiply_jacobian(self, s, t, P, cache=True):
+        # Straus/Shamir交错计算 s·G + t·P: 四个128位wNAF共用一条倍点链
+        G_low, G_high = self.shamir_base_tables()
+        mask = (1 << _SHAMIR_SPLIT) - 1
+        s %= self.n
+        streams = [
+            (self.wnaf(s & mask, _SHAMIR_G_WINDOW), G_low),
+            (self.wnaf(s >> _SHAMIR_SPLIT, _SHAMIR_G_WINDOW), G_high),
+        ]
+        if P is not None:
+            P_low, P_high = self.split_tables(P, self.window, cache)
+            t %= self.n
+            streams.append((self.wnaf(t & mask, self.window), P_low))
+            # P_high为None即 2^128·P = O，t的高半部分没有贡献
+            if P_high is not None:
+                streams.append((self.wnaf(t >> _SHAMIR_SPLIT, self.window), P_high))
+
+        result = None
+        for i in range(max(len(digits) for digits, _ in streams) - 1, -1, -1):
+            result = self.jacobian_double(result)
+            for digits, table in streams:
+                if i < len(digits):
+                    d = digits[i]
+                    if d > 0:
+                        result = self.jacobian_add_affine(result, table[d >> 1])
+                    elif d < 0:
+                        result = self.jacobian_add_affine(result, self.negate(table[-d >> 1]))
+        return result
+
+    def shamir_multiply(self, s, t, P):
+        if self.engine == 'jacobian':
+            return self.to_affine(self.shamir_multiply_jacobian(s, t, P))
+        return self.add_points(self.scalar_multiply_affine(s, self.G), self.scalar_multiply_affine(t, P))
+
+    def multiply_jacobian(self, k, P, cache=True):
+        if self.fixed_base and P == self.G:
+            return self.fixed_base_multiply(k)
+        return self.window_multiply(k, P, cache)
+
+    def scalar_multiply(self, k, P, cache=True):
+        # cache=False 用于C1这类一次性的基点，避免污染公钥预计算表缓存
+        if self.engine == 'jacobian':
+            return self.to_affine(self.multiply_jacobian(k, P, cache))
+        return self.scalar_multiply_affine(k, P)
+
+    def ladder_multiply(self, k, P):
+        # Montgomery阶梯: 每一位固定做一次点加和一次倍点，不随k的取值提前结束
+        # k先加上n或2n，使其位长恒为257位且最高位为1，运算次数与k无关
+        if P is None:
+            return None
+        k %= self.n
+        k += self.n
+        if k.bit_length() <= self.n.bit_length():
+            k += self.n
+        R = [self.to_jacobian(P), self.jacobian_double(self.to_jacobian(P))]
+        for i in range(k.bit_length() - 2, -1, -1):
+            bit = (k >> i) & 1
+            R[1 - bit] = self.jacobian_add(R[0], R[1])
+            R[bit] = self.jacobian_double(R[bit])
+        return R[0]
+
+    def secret_multiply_jacobian(self, k, P, cache=True):
+        # 标量为私钥或随机数k时使用，常量时间模式下走Montgomery阶梯
+        if self.constant_time:
+            return self.ladder_multiply(k, P)
+        return self.multiply_jacobian(k, P, cache)
+
+    def secret_multiply(self, k, P, cache=True):
+        if self.constant_time:
+            return self.to_affine(self.ladder_multiply(k, P))
+        return self.scalar_multiply(k, P, cache)
+
     def generate_keypair(self):
         private_key = random.randint(1, self.n - 1)
-        public_key = self.scalar_multiply(private_key, self.G)
+        public_key = self.secret_multiply(private_key, self.G)
         return private_key, public_key
 
     def kdf(self, Z, klen):
-        ct = 1
-        k = b''
-        while len(k) < klen:
-            k = k + hashlib.sha256(Z + ct.to_bytes(4, 'big')).digest()
-            ct += 1
-        return k[:klen]
+        return KDFStream(Z, self.hash_func).read(klen)
 
     def encrypt(self, message, public_key):
-        klen = len(message)
+        public_key = self.load_point(public_key)
         while True:
             k = random.randint(1, self.n - 1)
-            C1 = self.scalar_multiply(k, self.G)
-            kP = self.scalar_multiply(k, public_key)
-            t = self.kdf(kP[0].to_bytes(32, 'big') + kP[1].to_bytes(32, 'big'), klen)
-            if any(t):
-                break
+            C1 = self.secret_multiply(k, self.G)
+            kP = self.secret_multiply(k, public_key)
+            result = self.encrypt_with_points(message, C1, kP)
+            if result is not None:
+                return result
+
+    def encrypt_with_points(self, message, C1, kP):
+        # 已知 C1 = k·G 与 k·P 时完成加密，密钥流全零时返回None由调用方重新选k
+        t = self.kdf(kP[0].to_bytes(32, 'big') + kP[1].to_bytes(32, 'big'), len(message))
+        if not any(t):
+            return None
 
-        C2 = bytes(a ^ b for a, b in zip(message, t))
+        C2 = xor_bytes(message, t)
         C3_input = kP[0].to_bytes(32, 'big') + message + kP[1].to_bytes(32, 'big')
-        C3 = hashlib.sha256(C3_input).digest()
+        C3 = self.hash_func(C3_input).digest()
         return C1, C2, C3
 
     def decrypt(self, C1, C2, C3, private_key):
-        dC1 = self.scalar_multiply(private_key, C1)
+        try:
+            C1 = self.load_point(C1, cache=False)
+        except ValueError:
+            return None
+        dC1 = self.secret_multiply(private_key, C1, cache=False)
+        return self.decrypt_with_point(C2, C3, dC1)
+
+    def decrypt_with_point(self, C2, C3, dC1):
+        if dC1 is None:
+            return None
         t = self.kdf(dC1[0].to_bytes(32, 'big') + dC1[1].to_bytes(32, 'big'), len(C2))
         if not any(t):
             return None
 
-        message = bytes(a ^ b for a, b in zip(C2, t))
+        message = xor_bytes(C2, t)
         C3_input = dC1[0].to_bytes(32, 'big') + message + dC1[1].to_bytes(32, 'big')
-        C3_check = hashlib.sha256(C3_input).digest()
+        C3_check = self.hash_func(C3_input).digest()
 
         if C3 != C3_check:
             return None
         return message
 
-    def sign(self, message, private_key, public_key):
-        e = int.from_bytes(hashlib.sha256(message).digest(), 'big')
+    def encrypt_stream(self, source, dest, public_key, chunk_size=STREAM_CHUNK_SIZE):
+        # 从source分块读取明文，C2逐块写入dest，返回 (C1, C3)；内存占用与消息长度无关
+        public_key = self.load_point(public_key)
+        chunks = iter_chunks(source, chunk_size)
+        first = next(chunks, b'')
+        if not first:
+            raise ValueError("明文不能为空")
         while True:
             k = random.randint(1, self.n - 1)
-            kG = self.scalar_multiply(k, self.G)
-            x1 = kG[0]
+            C1 = self.secret_multiply(k, self.G)
+            kP = self.secret_multiply(k, public_key)
+            x2 = kP[0].to_bytes(32, 'big')
+            y2 = kP[1].to_bytes(32, 'big')
+            keystream = KDFStream(x2 + y2, self.hash_func)
+            # 密钥流整体为零时其前缀必为零，因此只需检查首块对应的前缀
+            t = keystream.read(len(first))
+            if any(t[:32]):
+                break
+
+        h = self.hash_func(x2)
+        h.update(first)
+        dest.write(xor_bytes(first, t))
+        for chunk in chunks:
+            h.update(chunk)
+            dest.write(xor_bytes(chunk, keystream.read(len(chunk))))
+        h.update(y2)
+        return C1, h.digest()
+
+    def decrypt_stream(self, source, dest, C1, C3, private_key, chunk_size=STREAM_CHUNK_SIZE):
+        # 明文在校验C3之前就已写入dest，返回False时调用方必须丢弃dest中的内容
+        try:
+            C1 = self.load_point(C1, cache=False)
+        except ValueError:
+            return False
+        dC1 = self.secret_multiply(private_key, C1, cache=False)
+        if dC1 is None:
+            return False
+        x2 = dC1[0].to_bytes(32, 'big')
+        y2 = dC1[1].to_bytes(32, 'big')
+        keystream = KDFStream(x2 + y2, self.hash_func)
+        h = self.hash_func(x2)
+        nonzero = False
+        for chunk in iter_chunks(source, chunk_size):
+            t = keystream.read(len(chunk))
+            nonzero = nonzero or any(t)
+            message = xor_bytes(chunk, t)
+            h.update(message)
+            dest.write(message)
+        h.update(y2)
+        return nonzero and h.digest() == C3
+
+    def compute_za(self, user_id, public_key):
+        # Z_A = H(ENTL_A || ID_A || a || b || xG || yG || xA || yA)
+        key = (user_id, public_key)
+        za = self.za_cache.get(key)
+        if za is None:
+            if len(user_id) * 8 > 0xFFFF:
+                raise ValueError("用户标识过长")
+            data = (len(user_id) * 8).to_bytes(2, 'big') + user_id + b''.join(
+                v.to_bytes(32, 'big') for v in (self.a, self.b, self.Gx, self.Gy, public_key[0], public_key[1]))
+            za = self.hash_func(data).digest()
+            self.za_cache.put(key, za, sys.getsizeof(za) + sys.getsizeof(user_id))
+        return za
+
+    def message_digest(self, message, public_key, user_id=None):
+        # 指定user_id时按标准计算 e = H(Z_A || M)，否则保持 e = H(M)
+        if user_id is None:
+            return int.from_bytes(self.hash_func(message).digest(), 'big')
+        h = self.hash_func(self.compute_za(user_id, public_key))
+        h.update(message)
+        return int.from_bytes(h.digest(), 'big')
+
+    def sign(self, message, private_key, public_key, user_id=None, nonce_pool=None):
+        # 传入nonce_pool时k与k·G取自预生成池，在线部分只剩几次模运算
+        if nonce_pool is not None and nonce_pool.private_key != private_key:
+            raise ValueError("随机数池与私钥不匹配")
+        public_key = self.load_point(public_key)
+        e = self.message_digest(message, public_key, user_id)
+        while True:
+            if nonce_pool is not None:
+                k, x1 = nonce_pool.take()
+                inv = nonce_pool.inverse
+            else:
+                k = random.randint(1, self.n - 1)
+                kG = self.secret_multiply(k, self.G)
+                x1 = kG[0]
+                inv = pow(1 + private_key, -1, self.n)
             r = (e + x1) % self.n
             if r == 0 or r + k == self.n:
                 continue
-            s = pow(1 + private_key, -1, self.n) * (k - r * private_key) % self.n
+            s = inv * (k - r * private_key) % self.n
             if s != 0:
                 break
         return r, s
 
-    def verify(self, message, signature, public_key):
+    def verify(self, message, signature, public_key, user_id=None):
         r, s = signature
         if not (1 <= r < self.n and 1 <= s < self.n):
             return False
+        try:
+            public_key = self.load_point(public_key)
+        except ValueError:
+            return False
 
-        e = int.from_bytes(hashlib.sha256(message).digest(), 'big')
+        e = self.message_digest(message, public_key, user_id)
         t = (r + s) % self.n
         if t == 0:
             return False
 
-        sG = self.scalar_multiply(s, self.G)
-        tP = self.scalar_multiply(t, public_key)
-        point = self.add_points(sG, tP)
+        point = self.shamir_multiply(s, t, public_key)
         if point is None:
             return False
 
         return r == (e + point[0]) % self.n
 
-    def batch_encrypt(self, messages, public_key):
-        results = []
-        for msg in messages:
-            result = self.encrypt(msg, public_key)
-            results.append(result)
-        return results
+    def batch_encrypt(self, messages, public_key, workers=None, chunk_size=64):
+        public_key = self.load_point(public_key)
+        messages = list(messages)
+        if workers == 1 or len(messages) <= chunk_size:
+            if self.engine == 'affine':
+                return [self.encrypt(msg, public_key) for msg in messages]
+
+            # 所有 k·G 与 k·P 保持Jacobian坐标，最后一次批量求逆
+            scalars = [random.randint(1, self.n - 1) for _ in messages]
+            points = []
+            for k in scalars:
+                points.append(self.secret_multiply_jacobian(k, self.G))
+                points.append(self.secret_multiply_jacobian(k, public_key))
+            points = self.batch_to_affine(points)
+
+            results = []
+            for i, msg in enumerate(messages):
+                result = self.encrypt_with_points(msg, points[2 * i], points[2 * i + 1])
+                if result is None:
+                    result = self.encrypt(msg, public_key)
+                results.append(result)
+            return results
+        return list(self.stream_encrypt(messages, public_key, workers, chunk_size))
+
+    def batch_decrypt(self, ciphertexts, private_key, workers=None, chunk_size=64):
+        ciphertexts = list(ciphertexts)
+        if workers == 1 or len(ciphertexts) <= chunk_size:
+            if self.engine == 'affine':
+                return [self.decrypt(C1, C2, C3, private_key) for C1, C2, C3 in ciphertexts]
+
+            points = []
+            for C1, _, _ in ciphertexts:
+                try:
+                    C1 = self.load_point(C1, cache=False)
+                except ValueError:
+                    points.append(None)
+                    continue
+                points.append(self.secret_multiply_jacobian(private_key, C1, cache=False))
+            points = self.batch_to_affine(points)
+            return [self.decrypt_with_point(C2, C3, dC1)
+                    for (_, C2, C3), dC1 in zip(ciphertexts, points)]
+        return list(self.stream_decrypt(ciphertexts, private_key, workers, chunk_size))
+
+    def stream_encrypt(self, messages, public_key, workers=None, chunk_size=64, max_in_flight=None):
+        # 逐块提交到进程池并按输入顺序产出密文，内存占用受在途分块数限制
+        public_key = self.load_point(public_key)
+        yield from self._stream_chunks(_encrypt_chunk, messages, public_key,
+                                       workers, chunk_size, max_in_flight)
+
+    def stream_decrypt(self, ciphertexts, private_key, workers=None, chunk_size=64, max_in_flight=None):
+        # 解码得到的C2、C3可能是memoryview，跨进程传递前需转换为bytes
+        ciphertexts = ((C1, bytes(C2), bytes(C3)) for C1, C2, C3 in ciphertexts)
+        yield from self._stream_chunks(_decrypt_chunk, ciphertexts, private_key,
+                                       workers, chunk_size, max_in_flight)
+
+    def _stream_chunks(self, func, items, key, workers, chunk_size, max_in_flight):
+        if chunk_size < 1:
+            raise ValueError(f"分块大小必须为正数: {chunk_size}")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if max_in_flight is None:
+            max_in_flight = 2 * workers
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.options,)) as executor:
+            pending = deque()
+            chunk = []
+            for item in items:
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    pending.append(executor.submit(func, chunk, key))
+                    chunk = []
+                    if len(pending) >= max_in_flight:
+                        yield from pending.popleft().result()
+            if chunk:
+                pending.append(executor.submit(func, chunk, key))
+            while pending:
+                yield from pending.popleft().result()
 
-    def batch_decrypt(self, ciphertexts, private_key):
+    def batch_verify(self, items, workers=None, chunk_size=64):
+        # items: [(message, signature, public_key[, user_id]), ...]，返回逐项的验签结果
+        items = list(items)
+        if chunk_size < 1:
+            raise ValueError(f"分块大小必须为正数: {chunk_size}")
+        if workers == 1 or len(items) <= chunk_size:
+            return [self.verify(*item) for item in items]
+
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
         results = []
-        for C1, C2, C3 in ciphertexts:
-            result = self.decrypt(C1, C2, C3, private_key)
-            results.append(result)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.options,)) as executor:
+            for chunk_result in executor.map(_verify_chunk, chunks):
+                results.extend(chunk_result)
         return results
 
     def clear_cache(self):
-        self.point_cache.clear()
-        self.scalar_cache.clear()
+        self.table_cache.clear()
+        self.key_cache.clear()
+        self.za_cache.clear()
+
+    def cache_stats(self):
+        return self.table_cache.stats()
+
+
+class NoncePool:
+    """后台线程预生成签名随机数 (k, (k·G).x)，签名时直接取用"""
+
+    def __init__(self, sm2, private_key, depth=64, refill_batch=8, background=True):
+        self.sm2 = sm2
+        self.private_key = private_key
+        self.inverse = pow(1 + private_key, -1, sm2.n)
+        self.depth = depth
+        self.refill_batch = refill_batch
+        self.nonces = deque()
+        self.condition = threading.Condition()
+        self.generated = 0
+        self.consumed = 0
+        self.starvations = 0
+        self.refill_time = 0.0
+        self.running = False
+        self.thread = None
+        if background:
+            self.start()
+
+    def generate(self, count):
+        sm2 = self.sm2
+        scalars = [random.randint(1, sm2.n - 1) for _ in range(count)]
+        if sm2.engine == 'jacobian':
+            points = sm2.batch_to_affine([sm2.secret_multiply_jacobian(k, sm2.G) for k in scalars])
+        else:
+            points = [sm2.secret_multiply(k, sm2.G) for k in scalars]
+        return [(k, P[0]) for k, P in zip(scalars, points)]
+
+    def fill(self):
+        # 同步填满随机数池，可在启动阶段或没有后台线程时调用
+        while len(self.nonces) < self.depth:
+            self._refill_once()
+
+    def _refill_once(self):
+        count = min(self.refill_batch, self.depth - len(self.nonces))
+        start_time = time.perf_counter()
+        batch = self.generate(count)
+        elapsed = time.perf_counter() - start_time
+        with self.condition:
+            self.nonces.extend(batch)
+            self.generated += len(batch)
+            self.refill_time += elapsed
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and len(self.nonces) >= self.depth:
+                    self.condition.wait()
+                if not self.running:
+                    return
+            self._refill_once()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='sm2-nonce-pool', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def take(self):
+        with self.condition:
+            if self.nonces:
+                nonce = self.nonces.popleft()
+                self.consumed += 1
+                self.condition.notify()
+                return nonce
+            self.starvations += 1
+            self.consumed += 1
+            self.condition.notify()
+        # 池已耗尽时在当前线程现场生成
+        return self.generate(1)[0]
+
+    def stats(self):
+        with self.condition:
+            return {
+                'available': len(self.nonces),
+                'depth': self.depth,
+                'generated': self.generated,
+                'consumed': self.consumed,
+                'starvations': self.starvations,
+                'refill_rate': self.generated / self.refill_time if self.refill_time else 0.0,
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+# 工作进程内的SM2实例，由 _init_worker 在进程启动时创建并预热
+_worker_sm2 = None
+
+
+def _init_worker(options):
+    global _worker_sm2
+    # fork出的子进程会继承父进程的随机数状态，必须重新播种，否则各进程生成相同的k
+    random.seed()
+    _worker_sm2 = SM2Improved(**options)
+    _worker_sm2.warm_up()
+
+
+def _verify_chunk(items):
+    return [_worker_sm2.verify(*item) for item in items]
+
+
+def _encrypt_chunk(messages, public_key):
+    return _worker_sm2.batch_encrypt(messages, public_key, workers=1)
+
+
+def _decrypt_chunk(ciphertexts, private_key):
+    return _worker_sm2.batch_decrypt(ciphertexts, private_key, workers=1)
+
+
+def benchmark_engines(rounds=10):
+    """对比仿射坐标与Jacobian坐标两种点运算引擎的耗时
+
+    scalar_multiply 两侧都是二进制倍点-加法，只比较坐标系；sign/verify 为整条调用路径，
+    jacobian一侧还包含wNAF与验签的Shamir联合乘法。两侧都不使用基点固定基表
+    """
+    engines = {
+        'affine': SM2Improved(engine='affine'),
+        'jacobian': SM2Improved(engine='jacobian', fixed_base=False),
+    }
+    multiply = {
+        'affine': engines['affine'].scalar_multiply_affine,
+        'jacobian': lambda k, P: engines['jacobian'].to_affine(engines['jacobian'].scalar_multiply_jacobian(k, P)),
+    }
+    n = engines['affine'].n
+    scalars = [random.randint(1, n - 1) for _ in range(rounds)]
+    private_key, public_key = engines['jacobian'].generate_keypair()
+    message = b"benchmark message"
+
+    results = {}
+    reference = None
+    for name, sm2 in engines.items():
+        start_time = time.perf_counter()
+        points = [multiply[name](k, sm2.G) for k in scalars]
+        mul_time = (time.perf_counter() - start_time) / rounds
+
+        if reference is None:
+            reference = points
+        elif points != reference:
+            raise RuntimeError(f"{name}引擎的标量乘法结果不一致")
+
+        start_time = time.perf_counter()
+        signatures = [sm2.sign(message, private_key, public_key) for _ in range(rounds)]
+        sign_time = (time.perf_counter() - start_time) / rounds
+
+        start_time = time.perf_counter()
+        for signature in signatures:
+            sm2.verify(message, signature, public_key)
+        verify_time = (time.perf_counter() - start_time) / rounds
+
+        sm2.clear_cache()
+        results[name] = {'scalar_multiply': mul_time, 'sign': sign_time, 'verify': verify_time}
+
+    print(f"{'操作':<16}{'affine':>12}{'jacobian':>12}{'加速比':>10}")
+    for op in ('scalar_multiply', 'sign', 'verify'):
+        affine_time = results['affine'][op]
+        jacobian_time = results['jacobian'][op]
+        print(f"{op:<16}{affine_time:>11.6f}s{jacobian_time:>11.6f}s{affine_time / jacobian_time:>9.2f}x")
+    print("scalar_multiply 只比较坐标系；sign/verify 的jacobian列含wNAF与Shamir联合乘法，未启用固定基表")
+    return results
+
+
+def benchmark_wnaf(widths=(2, 3, 4, 5, 6, 7, 8), rounds=20):
+    """统计不同wNAF宽度下每次变基标量乘法的点运算次数和耗时"""
+    sm2 = SM2Improved()
+    _, P = sm2.generate_keypair()
+    scalars = [random.randint(1, sm2.n - 1) for _ in range(rounds)]
+    expected = [sm2.to_affine(sm2.scalar_multiply_jacobian(k, P)) for k in scalars]
+
+    print(f"{'w':>3}{'预计算':>8}{'倍点':>8}{'加法':>8}{'含预计算':>12}{'已缓存':>12}")
+    results = {}
+    for w in widths:
+        doubles = adds = 0
+        for k in scalars:
+            digits = sm2.wnaf(k, w)
+            doubles += len(digits) - 1
+            adds += sum(1 for d in digits if d) - 1
+        precompute = 1 << (w - 2)
+
+        start_time = time.perf_counter()
+        for k in scalars:
+            sm2.window_multiply(k, P, cache=False, w=w)
+        cold_time = (time.perf_counter() - start_time) / rounds
+
+        sm2.window_table(P, w=w)
+        start_time = time.perf_counter()
+        points = [sm2.to_affine(sm2.window_multiply(k, P, w=w)) for k in scalars]
+        warm_time = (time.perf_counter() - start_time) / rounds
+        if points != expected:
+            raise RuntimeError(f"w={w}时wNAF标量乘法结果不一致")
+
+        results[w] = {
+            'precompute': precompute,
+            'doubles': doubles / rounds,
+            'adds': adds / rounds,
+            'cold_time': cold_time,
+            'warm_time': warm_time,
+        }
+        print(f"{w:>3}{precompute:>8}{doubles / rounds:>8.1f}{adds / rounds:>8.1f}"
+              f"{cold_time * 1000:>10.3f}ms{warm_time * 1000:>10.3f}ms")
+    return results
+
+
+def benchmark_batch_inversion(sizes=(1, 4, 16, 64, 256, 1024)):
+    """对比逐点求逆与Montgomery批量求逆时每个点的转换耗时"""
+    sm2 = SM2Improved()
+    point = sm2.to_jacobian(sm2.G)
+    pool = []
+    for _ in range(max(sizes)):
+        point = sm2.jacobian_add_affine(sm2.jacobian_double(point), sm2.G)
+        pool.append(point)
+
+    print(f"{'n':>6}{'逐点求逆':>14}{'批量求逆':>14}{'加速比':>10}")
+    results = {}
+    for n in sizes:
+        points = pool[:n]
+        rounds = max(1, 2048 // n)
+
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            single = [sm2.to_affine(P) for P in points]
+        single_time = (time.perf_counter() - start_time) / (rounds * n)
+
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            batch = sm2.batch_to_affine(points)
+        batch_time = (time.perf_counter() - start_time) / (rounds * n)
+
+        if single != batch:
+            raise RuntimeError(f"n={n}时批量求逆结果不一致")
+        results[n] = {'single': single_time, 'batch': batch_time}
+        print(f"{n:>6}{single_time * 1e6:>12.2f}us{batch_time * 1e6:>12.2f}us{single_time / batch_time:>9.2f}x")
+    return results
+
+
+def benchmark_ladder(rounds=20):
+    """对比常量时间Montgomery阶梯与默认快速路径在私钥相关操作上的开销"""
+    fast = SM2Improved()
+    ladder = SM2Improved(constant_time=True)
+    private_key, public_key = fast.generate_keypair()
+    message = b"benchmark message"
+    ciphertext = fast.encrypt(message, public_key)
+    scalars = [random.randint(1, fast.n - 1) for _ in range(rounds)]
+
+    operations = {
+        'k*G': lambda sm2, k: sm2.secret_multiply(k, sm2.G),
+        'k*P': lambda sm2, k: sm2.secret_multiply(k, public_key),
+        'sign': lambda sm2, k: sm2.sign(message, private_key, public_key),
+        'decrypt': lambda sm2, k: sm2.decrypt(*ciphertext, private_key),
+    }
+    print(f"{'操作':<10}{'快速路径':>12}{'常量时间':>12}{'开销':>10}")
+    results = {}
+    for op, func in operations.items():
+        times = []
+        for sm2 in (fast, ladder):
+            start_time = time.perf_counter()
+            outputs = [func(sm2, k) for k in scalars]
+            times.append((time.perf_counter() - start_time) / rounds)
+            if op in ('k*G', 'k*P'):
+                results.setdefault(op + '_outputs', []).append(outputs)
+        if op in ('k*G', 'k*P') and results[op + '_outputs'][0] != results[op + '_outputs'][1]:
+            raise RuntimeError(f"{op}在常量时间模式下结果不一致")
+        results[op] = {'fast': times[0], 'constant_time': times[1]}
+        print(f"{op:<10}{times[0] * 1000:>10.3f}ms{times[1] * 1000:>10.3f}ms{times[1] / times[0]:>9.2f}x")
+    return {op: value for op, value in results.items() if not op.endswith('_outputs')}
 
 
 def main():
@@ -196,9 +1235,123 @@ def main():
         if msg:
             print(f"  消息{i}: {msg.decode('utf-8')}")
 
-    print(f"\n缓存统计:")
-    print(f"  标量乘法缓存: {len(sm2.scalar_cache)} 项")
-    print(f"  点加法缓存: {len(sm2.point_cache)} 项")
+    stats = sm2.cache_stats()
+    print(f"\n公钥预计算表缓存统计:")
+    print(f"  缓存项: {stats['entries']} 项, 约 {stats['bytes']} 字节")
+    print(f"  命中: {stats['hits']}, 未命中: {stats['misses']}, 淘汰: {stats['evictions']}")
+
+    print("\n4. 测试批量验签...")
+    items = []
+    for i in range(256):
+        msg = f"签名消息{i}".encode('utf-8')
+        signature = sm2.sign(msg, private_key, public_key)
+        if i % 50 == 0:
+            msg = msg + b'!'
+        items.append((msg, signature, public_key))
+
+    start_time = time.time()
+    serial_results = sm2.batch_verify(items, workers=1)
+    serial_time = time.time() - start_time
+
+    start_time = time.time()
+    parallel_results = sm2.batch_verify(items, chunk_size=32)
+    parallel_time = time.time() - start_time
+    print(f"串行验签 {len(items)} 条耗时: {serial_time:.6f}秒")
+    print(f"多进程验签 {len(items)} 条耗时: {parallel_time:.6f}秒")
+    print(f"验签通过: {sum(parallel_results)} 条, 结果一致: {serial_results == parallel_results}")
+
+    print("\n5. 测试SM3与Z_A签名...")
+    sm3_sm2 = SM2Improved(hash_name='sm3')
+    signature = sm3_sm2.sign(message, private_key, public_key, DEFAULT_USER_ID)
+    ok = sm3_sm2.verify(message, signature, public_key, DEFAULT_USER_ID)
+    ok = ok and not sm3_sm2.verify(message, signature, public_key, b'another-user')
+    start_time = time.time()
+    for _ in range(100):
+        sm3_sm2.sign(message, private_key, public_key, DEFAULT_USER_ID)
+    sign_time = (time.time() - start_time) / 100
+    print(f"SM3带Z_A签名平均耗时: {sign_time:.6f}秒, Z_A缓存: {sm3_sm2.za_cache.stats()}")
+    print(f"{'✓' if ok else '✗'} SM3签名验证{'成功' if ok else '失败'}")
+
+    print("\n6. 测试随机数池签名...")
+    with NoncePool(sm2, private_key, depth=128) as pool:
+        pool.fill()
+        start_time = time.time()
+        signatures = [sm2.sign(message, private_key, public_key, nonce_pool=pool) for _ in range(100)]
+        pool_sign_time = (time.time() - start_time) / 100
+        ok = all(sm2.verify(message, signature, public_key) for signature in signatures)
+        stats = pool.stats()
+    print(f"随机数池签名平均耗时: {pool_sign_time:.6f}秒")
+    print(f"池中剩余: {stats['available']}/{stats['depth']}, 生成: {stats['generated']}, "
+          f"消耗: {stats['consumed']}, 耗尽次数: {stats['starvations']}, 生成速率: {stats['refill_rate']:.1f}个/秒")
+    print(f"{'✓' if ok else '✗'} 随机数池签名验证{'成功' if ok else '失败'}")
+
+    print("\n7. 测试流式并行加密解密...")
+    records = (f"记录{i}".encode('utf-8') for i in range(200))
+    start_time = time.time()
+    ciphertexts = list(sm2.stream_encrypt(records, public_key, chunk_size=25, max_in_flight=2))
+    stream_encrypt_time = time.time() - start_time
+    start_time = time.time()
+    plaintexts = list(sm2.stream_decrypt(iter(ciphertexts), private_key, chunk_size=25, max_in_flight=2))
+    stream_decrypt_time = time.time() - start_time
+    ok = plaintexts == [f"记录{i}".encode('utf-8') for i in range(200)]
+    print(f"流式加密 {len(ciphertexts)} 条耗时: {stream_encrypt_time:.6f}秒")
+    print(f"流式解密 {len(plaintexts)} 条耗时: {stream_decrypt_time:.6f}秒")
+    print(f"{'✓' if ok else '✗'} 流式加密解密{'成功' if ok else '失败'}")
+
+    print("\n8. 测试大消息流式加密解密...")
+    payload = os.urandom(8 * 1024 * 1024)
+    encrypted = io.BytesIO()
+    start_time = time.time()
+    C1, C3 = sm2.encrypt_stream(io.BytesIO(payload), encrypted, public_key)
+    stream_encrypt_time = time.time() - start_time
+    decrypted = io.BytesIO()
+    encrypted.seek(0)
+    start_time = time.time()
+    ok = sm2.decrypt_stream(encrypted, decrypted, C1, C3, private_key)
+    stream_decrypt_time = time.time() - start_time
+    ok = ok and decrypted.getvalue() == payload
+    print(f"流式加密 {len(payload) // 1024 // 1024} MB 耗时: {stream_encrypt_time:.6f}秒")
+    print(f"流式解密 {len(payload) // 1024 // 1024} MB 耗时: {stream_decrypt_time:.6f}秒")
+    print(f"{'✓' if ok else '✗'} 大消息流式加密解密{'成功' if ok else '失败'}")
+
+    print("\n9. 测试密文二进制编码...")
+    codec = SM2Codec(sm2, order='C1C3C2', compressed=True)
+    ciphertexts = sm2.batch_encrypt(messages, public_key)
+    packed = codec.pack_ciphertexts(ciphertexts)
+    with tempfile.TemporaryFile() as f:
+        f.write(packed)
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decoded = list(codec.iter_ciphertexts(mm))
+            decrypted_messages = sm2.batch_decrypt(decoded, private_key)
+            del decoded
+    signature = sm2.sign(message, private_key, public_key)
+    sig_ok = sm2.verify(message, codec.decode_signature(codec.encode_signature(signature)), public_key)
+    ok = decrypted_messages == messages and sig_ok
+    print(f"{len(ciphertexts)} 条密文打包后共 {len(packed)} 字节 (压缩C1)")
+    print(f"{'✓' if ok else '✗'} 从mmap解码并解密{'成功' if ok else '失败'}")
+
+    compressed_key = sm2.encode_point(public_key, compressed=True)
+    for _ in range(10):
+        sm2.verify(message, signature, compressed_key)
+    bad_C1 = (C1[0], (C1[1] + 1) % sm2.p)
+    ok = sm2.decrypt(bad_C1, C2, C3, private_key) is None
+    ok = ok and not sm2.verify(message, signature, (public_key[0], public_key[1] ^ 1))
+    stats = sm2.key_cache.stats()
+    print(f"压缩公钥 {len(compressed_key)} 字节, 解压缓存命中: {stats['hits']}, 未命中: {stats['misses']}")
+    print(f"{'✓' if ok else '✗'} 拒绝不在曲线上的点{'成功' if ok else '失败'}")
+
+    print("\n10. 点运算引擎对比...")
+    benchmark_engines()
+
+    print("\n11. wNAF窗口宽度对比...")
+    benchmark_wnaf()
+
+    print("\n12. 批量求逆对比...")
+    benchmark_batch_inversion()
+
+    print("\n13. 常量时间模式开销...")
+    benchmark_ladder()
 
 
 if __name__ == "__main__":
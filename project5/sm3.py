@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SM2使用的哈希后端
+sm3按 OpenSSL(hashlib) -> 原生动态库(ctypes) -> 纯Python 的顺序选择可用实现
+短消息下ctypes的调用开销比OpenSSL大，因此OpenSSL优先
+"""
+
+import ctypes
+import hashlib
+import os
+import struct
+
+IV = (0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
+      0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E)
+MASK = 0xFFFFFFFF
+# 预先计算每一轮循环左移后的常量 T_j <<< j
+T_ROTATED = [((t << (j % 32)) | (t >> (32 - j % 32))) & MASK
+             for j, t in ((j, 0x79CC4519 if j < 16 else 0x7A879D8A) for j in range(64))]
+
+# 原生库默认从project4目录加载，可通过环境变量SM3_LIBRARY指定路径
+DEFAULT_LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'project4', 'libsm3.so')
+
+
+def _rotl(x, n):
+    n %= 32
+    return ((x << n) | (x >> (32 - n))) & MASK
+
+
+def _compress(state, block):
+    W = list(struct.unpack('>16I', block))
+    for i in range(16, 68):
+        x = W[i - 16] ^ W[i - 9] ^ _rotl(W[i - 3], 15)
+        W.append(x ^ _rotl(x, 15) ^ _rotl(x, 23) ^ _rotl(W[i - 13], 7) ^ W[i - 6])
+
+    A, B, C, D, E, F, G, H = state
+    for j in range(64):
+        A12 = _rotl(A, 12)
+        SS1 = _rotl((A12 + E + T_ROTATED[j]) & MASK, 7)
+        SS2 = SS1 ^ A12
+        if j < 16:
+            FF = A ^ B ^ C
+            GG = E ^ F ^ G
+        else:
+            FF = (A & B) | (A & C) | (B & C)
+            GG = (E & F) | (~E & G)
+        TT1 = (FF + D + SS2 + (W[j] ^ W[j + 4])) & MASK
+        TT2 = (GG + H + SS1 + W[j]) & MASK
+        D = C
+        C = _rotl(B, 9)
+        B = A
+        A = TT1
+        H = G
+        G = _rotl(F, 19)
+        F = E
+        E = TT2 ^ _rotl(TT2, 9) ^ _rotl(TT2, 17)
+
+    return [s ^ v for s, v in zip(state, (A, B, C, D, E, F, G, H))]
+
+
+class SM3Hash:
+    """纯Python的SM3实现，接口与hashlib的哈希对象一致"""
+
+    name = 'sm3'
+    digest_size = 32
+    block_size = 64
+
+    def __init__(self, data=b''):
+        self.state = list(IV)
+        self.buffer = b''
+        self.length = 0
+        if data:
+            self.update(data)
+
+    def update(self, data):
+        data = bytes(data)
+        self.length += len(data)
+        data = self.buffer + data
+        end = len(data) - len(data) % 64
+        for i in range(0, end, 64):
+            self.state = _compress(self.state, data[i:i + 64])
+        self.buffer = data[end:]
+
+    def copy(self):
+        other = SM3Hash()
+        other.state = list(self.state)
+        other.buffer = self.buffer
+        other.length = self.length
+        return other
+
+    def digest(self):
+        pad_len = (55 - self.length) % 64
+        tail = self.buffer + b'\x80' + b'\x00' * pad_len + struct.pack('>Q', self.length * 8)
+        state = self.state
+        for i in range(0, len(tail), 64):
+            state = _compress(state, tail[i:i + 64])
+        return struct.pack('>8I', *state)
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+
+_native_lib = None
+
+
+def load_native_library(path=None):
+    """加载由 project4/sm3_lib.c 编译出的动态库，失败时返回None"""
+    global _native_lib
+    if _native_lib is not None and path is None:
+        return _native_lib
+    path = path or os.environ.get('SM3_LIBRARY', DEFAULT_LIBRARY)
+    if not os.path.exists(path):
+        return None
+    try:
+        lib = ctypes.CDLL(path)
+    except OSError:
+        return None
+
+    lib.sm3_ctx_size.restype = ctypes.c_size_t
+    lib.sm3_init.argtypes = [ctypes.c_void_p]
+    lib.sm3_update.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
+    lib.sm3_final.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    _native_lib = lib
+    return lib
+
+
+class NativeSM3Hash:
+    """基于ctypes调用原生SM3动态库的哈希对象"""
+
+    name = 'sm3'
+    digest_size = 32
+    block_size = 64
+
+    def __init__(self, data=b''):
+        self.lib = load_native_library()
+        if self.lib is None:
+            raise RuntimeError("未找到SM3原生动态库")
+        self.ctx = ctypes.create_string_buffer(self.lib.sm3_ctx_size())
+        self.lib.sm3_init(self.ctx)
+        if data:
+            self.update(data)
+
+    def update(self, data):
+        data = bytes(data)
+        self.lib.sm3_update(self.ctx, data, len(data))
+
+    def copy(self):
+        other = NativeSM3Hash.__new__(NativeSM3Hash)
+        other.lib = self.lib
+        other.ctx = ctypes.create_string_buffer(self.ctx.raw, len(self.ctx))
+        return other
+
+    def digest(self):
+        ctx = ctypes.create_string_buffer(self.ctx.raw, len(self.ctx))
+        out = ctypes.create_string_buffer(32)
+        self.lib.sm3_final(ctx, out)
+        return out.raw
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+
+def _openssl_sm3():
+    try:
+        hashlib.new('sm3')
+    except ValueError:
+        return None
+    return lambda data=b'': hashlib.new('sm3', data)
+
+
+def get_hash(name='sha256'):
+    """返回与 hashlib.sha256 用法相同的哈希构造函数"""
+    if name == 'sha256':
+        return hashlib.sha256
+    if name == 'sm3':
+        constructor = _openssl_sm3()
+        if constructor is not None:
+            return constructor
+        if load_native_library() is not None:
+            return NativeSM3Hash
+        return SM3Hash
+    if name == 'sm3-native':
+        if load_native_library() is None:
+            raise RuntimeError("未找到SM3原生动态库")
+        return NativeSM3Hash
+    if name == 'sm3-openssl':
+        constructor = _openssl_sm3()
+        if constructor is None:
+            raise RuntimeError("当前OpenSSL不支持SM3")
+        return constructor
+    if name == 'sm3-python':
+        return SM3Hash
+    raise ValueError(f"未知的哈希算法: {name}")
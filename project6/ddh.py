@@ -5,89 +5,554 @@ DDH-based Private Intersection-Sum Protocol 简化实现
 基于DDH假设的私密交集求和协议
 """
 
+import hashlib
+import json
+import os
 import random
 import math
+import secrets
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+# RFC 3526 第14组 2048位MODP群，p为安全素数 p = 2q + 1
+MODP_2048_P = int(
+    'FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74'
+    '020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F1437'
+    '4FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED'
+    'EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF05'
+    '98DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB'
+    '9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B'
+    'E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF695581718'
+    '3995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF', 16)
+HASH_DOMAIN = b'DDH-PSI-Sum hash-to-group'
+# 隐藏交集记录位置的打乱使用操作系统的密码学随机源，不用梅森旋转
+_SECURE_RANDOM = secrets.SystemRandom()
+
+
+class DDHGroup:
+    """安全素数群中q阶二次剩余子群，DDH假设在该子群上成立"""
+    
+    def __init__(self, p=MODP_2048_P, g=2, exponent_bits=256):
+        self.p = p
+        self.q = (p - 1) // 2
+        # p ≡ 7 (mod 8) 时2是二次剩余，生成q阶子群
+        self.g = g
+        self.byte_length = (p.bit_length() + 7) // 8
+        # 短指数: 2048位群的安全强度约112位，按RFC 7919取256位指数，速度约为全长指数的8倍
+        # exponent_bits为None时在整个 [1, q) 中取指数
+        self.exponent_bits = exponent_bits
+    
+    def random_exponent(self):
+        if self.exponent_bits is None:
+            return secrets.randbelow(self.q - 1) + 1
+        return secrets.randbelow((1 << self.exponent_bits) - 1) + 1
+    
+    def hash_to_group(self, identifier):
+        """将标识符映射到二次剩余子群: 扩展哈希到比p多64位再取模，平方后落入子群"""
+        digest = hashlib.shake_256(HASH_DOMAIN + encode_identifier(identifier)).digest(self.byte_length + 8)
+        h = int.from_bytes(digest, 'big') % self.p
+        return h * h % self.p
+
+
+def element_digest(element, byte_length):
+    """群元素的64位截断摘要，用于紧凑地比较双重掩码后的元素"""
+    digest = hashlib.blake2b(element.to_bytes(byte_length, 'big'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def encode_identifier(identifier):
+    if isinstance(identifier, bytes):
+        return identifier
+    return str(identifier).encode('utf-8')
+
+
+def _mask_chunk(identifiers, group, key):
+    # 工作进程: 哈希到群后求 H(x)^key
+    p = group.p
+    return [pow(group.hash_to_group(identifier), key, p) for identifier in identifiers]
+
+
+# 工作进程内只含公钥的加密方，由 _init_worker 在进程启动时安装一次，
+# 两张窗口表 (约1.4MB) 不必随每个块重新序列化
+_worker_protocol = None
+
+
+def _init_worker(protocol):
+    global _worker_protocol
+    # 只有group=None的演示用p=101群从random取随机指数，fork出的子进程会继承父进程的随机数状态，需重新播种；
+    # 2048位群的指数和打乱都使用操作系统随机源，不受影响
+    random.seed()
+    _worker_protocol = protocol
+
+
+def _encrypt_exponent_chunk(values):
+    return _worker_protocol.encrypt_exponent_many(values)
+
+
+def _digest_chunk(elements, group, key):
+    # 工作进程: 求 e^key 后只返回64位摘要，减少进程间和网络传输
+    p = group.p
+    return [element_digest(pow(element, key, p), group.byte_length) for element in elements]
+
+
+def _digest_array_chunk(elements, group, key):
+    return np.array(_digest_chunk(elements, group, key), dtype=np.uint64)
+
+
+def _mask_encrypt_chunk(items, group, key):
+    # 工作进程: items为 [(标识符, 值)]，返回 [(H(w)^key, c1, c2)]，加密使用 _init_worker 安装的公钥
+    p = group.p
+    return [(pow(group.hash_to_group(identifier), key, p),) + _worker_protocol.encrypt_exponent(value)
+            for identifier, value in items]
+
+
+class PSISumEngine:
+    """DDH私密交集求和的批量运算引擎，哈希到群和模幂按块分发到进程池"""
+    
+    def __init__(self, group=None, workers=None, chunk_size=256):
+        if chunk_size < 1:
+            raise ValueError(f"分块大小必须为正数: {chunk_size}")
+        self.group = group if group is not None else DDHGroup()
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+    
+    def _parallel(self, items):
+        return self.workers > 1 and len(items) > self.chunk_size
+    
+    def _map_chunks(self, func, items, *args, protocol=None):
+        # 返回各块的计算结果列表，protocol不为None时在每个工作进程启动时安装一次
+        items = list(items)
+        if not self._parallel(items):
+            return [func(items, *args)]
+        
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(protocol,)) as executor:
+            return list(executor.map(func, chunks, *(repeat(arg) for arg in args)))
+    
+    def _map(self, func, items, *args, protocol=None):
+        results = []
+        for chunk_result in self._map_chunks(func, items, *args, protocol=protocol):
+            results.extend(chunk_result)
+        return results
+    
+    def mask(self, identifiers, key):
+        """批量计算 H(x)^key"""
+        return self._map(_mask_chunk, identifiers, self.group, key)
+    
+    def encrypt_values(self, protocol, values):
+        """用protocol的公钥批量进行指数ElGamal加密，预计算表在每个工作进程启动时只发送一次"""
+        values = list(values)
+        if not self._parallel(values):
+            return protocol.encrypt_exponent_many(values)
+        return self._map(_encrypt_exponent_chunk, values, protocol=protocol.public_copy())
+    
+    def digests(self, elements, key):
+        """批量计算 e^key 的64位摘要，返回uint64数组，每个元素只占8字节"""
+        chunks = self._map_chunks(_digest_array_chunk, elements, self.group, key)
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint64)
+
+
+class DigestIndex:
+    """双重掩码元素摘要的紧凑索引: 排序后的uint64数组
+    
+    每个元素8字节，而Python的set中一个2048位整数约需300字节；
+    查询时对整批摘要做一次向量化的二分查找
+    """
+    
+    def __init__(self, digests):
+        self.digests = np.sort(np.asarray(digests, dtype=np.uint64))
+    
+    def __len__(self):
+        return len(self.digests)
+    
+    @property
+    def nbytes(self):
+        return self.digests.nbytes
+    
+    def match(self, queries):
+        """返回queries中出现在索引里的元素的下标"""
+        queries = np.asarray(queries, dtype=np.uint64)
+        if not len(self.digests):
+            return np.empty(0, dtype=np.intp)
+        positions = np.searchsorted(self.digests, queries)
+        np.minimum(positions, len(self.digests) - 1, out=positions)
+        return np.flatnonzero(self.digests[positions] == queries)
+
+
+class PSIParty1:
+    """持有标识符集合的一方，得到交集大小以及交集值总和的密文"""
+    
+    def __init__(self, identifiers, engine):
+        self.identifiers = list(identifiers)
+        self.engine = engine
+        self.key = engine.group.random_exponent()
+    
+    def round1(self):
+        """发送打乱顺序的 H(v)^k1"""
+        masked = self.engine.mask(self.identifiers, self.key)
+        _SECURE_RANDOM.shuffle(masked)
+        return masked
+    
+    def round3(self, double_masked, pairs, protocol):
+        """double_masked为自己的 H(v)^(k1k2) 的64位摘要，pairs为P2的 (H(w)^k2, 值的密文)
+        
+        返回 (交集大小, 交集值总和的密文)，protocol为只含P2公钥的加密方，用于同态相加和重随机化
+        """
+        own = DigestIndex(double_masked)
+        theirs = self.engine.digests([element for element, _ in pairs], self.key)
+        matched = own.match(theirs)
+        # 乘上0的密文重随机化，P2无法从聚合密文推断是哪些密文相乘
+        total = protocol.aggregate([pairs[i][1] for i in matched] + [protocol.encrypt_exponent(0)])
+        return len(matched), total
+
+
+class PSIParty2:
+    """持有 {标识符: 值} 的一方"""
+    
+    def __init__(self, data, engine, dlog_table=None):
+        self.data = data
+        self.engine = engine
+        self.key = engine.group.random_exponent()
+        # 值使用P2自己的指数ElGamal密钥加密，只有P2能解密总和
+        self.protocol = DDHProtocol(engine.group, verbose=False)
+        self.dlog_table = dlog_table
+    
+    def public_protocol(self):
+        """发送给P1的只含公钥的加密方"""
+        return self.protocol.public_copy()
+    
+    def round2(self, masked):
+        """对P1的元素再次掩码后只发送64位摘要，并发送自己的 (H(w)^k2, 值的密文)
+        
+        摘要按数值排序发送，顺序与P1的输入顺序无关，与打乱的效果相同
+        """
+        double_masked = np.sort(self.engine.digests(masked, self.key))
+        
+        identifiers = list(self.data)
+        own_masked = self.engine.mask(identifiers, self.key)
+        ciphertexts = self.engine.encrypt_values(self.protocol.public_copy(),
+                                                 [self.data[identifier] for identifier in identifiers])
+        pairs = list(zip(own_masked, ciphertexts))
+        _SECURE_RANDOM.shuffle(pairs)
+        return double_masked, pairs
+    
+    def finish(self, total):
+        """解密P1聚合后的密文，得到交集值总和"""
+        if self.dlog_table is None:
+            self.dlog_table = DiscreteLogTable(self.protocol.g, self.protocol.p)
+        return self.protocol.decrypt_exponent(total, self.dlog_table)
+
+
+def private_intersection_sum(identifiers, data, engine=None, dlog_table=None):
+    """以P1持有identifiers、P2持有data运行一次协议，返回 (交集大小, P2在交集上的值总和)"""
+    engine = engine if engine is not None else PSISumEngine()
+    party1 = PSIParty1(identifiers, engine)
+    party2 = PSIParty2(data, engine, dlog_table)
+    double_masked, pairs = party2.round2(party1.round1())
+    size, total = party1.round3(double_masked, pairs, party2.public_protocol())
+    return size, party2.finish(total)
+
+
+class FixedBaseTable:
+    """固定底数的窗口预计算表: rows[i][j] = base^(j * 2^(window*i)) mod modulus
+    
+    计算 base^k 时按窗口拆分k，每个窗口查表相乘一次，不需要平方
+    """
+    
+    def __init__(self, base, modulus, max_bits, window=4):
+        self.modulus = modulus
+        self.window = window
+        self.max_bits = max_bits
+        self.rows = []
+        
+        row_base = base % modulus
+        for _ in range((max_bits + window - 1) // window):
+            row = [1]
+            for _ in range((1 << window) - 1):
+                row.append(row[-1] * row_base % modulus)
+            self.rows.append(row)
+            # 下一行的底数为 base^(2^window)
+            row_base = row[-1] * row_base % modulus
+    
+    def pow(self, exponent):
+        if exponent < 0 or exponent.bit_length() > self.max_bits:
+            raise ValueError(f"指数超出预计算表范围: {exponent.bit_length()}位")
+        modulus = self.modulus
+        mask = (1 << self.window) - 1
+        result = 1
+        for row in self.rows:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = result * row[digit] % modulus
+            exponent >>= self.window
+        return result
+
+
+class DiscreteLogTable:
+    """小步大步(BSGS)离散对数表，求解 g^m = h，0 <= m <= max_value
+    
+    小步 g^j (0 <= j < step) 只保存对64位素数取模的结果作为键，命中后再用一次模幂确认，
+    表可保存到文件，下次直接加载
+    """
+    
+    # 不能直接取低64位: g=2时 g^j 在 j >= 64 的低位全为0
+    KEY_MODULUS = (1 << 64) - 59
+    
+    def __init__(self, g, p, max_value=1 << 20, keys=None):
+        self.g = g
+        self.p = p
+        self.max_value = max_value
+        self.step = math.isqrt(max_value) + 1
+        
+        if keys is None:
+            keys = array('Q')
+            current = 1
+            for _ in range(self.step):
+                keys.append(current % self.KEY_MODULUS)
+                current = current * g % p
+        self.keys = keys
+        self.baby_steps = {key: j for j, key in enumerate(keys)}
+        # 大步因子 g^(-step)
+        self.giant_step = pow(pow(g, self.step, p), -1, p)
+    
+    def solve(self, target):
+        p = self.p
+        h = target
+        for i in range(self.max_value // self.step + 1):
+            j = self.baby_steps.get(h % self.KEY_MODULUS)
+            if j is not None:
+                m = i * self.step + j
+                if m <= self.max_value and pow(self.g, m, p) == target:
+                    return m
+            h = h * self.giant_step % p
+        return None
+    
+    def save(self, path):
+        header = {'g': hex(self.g), 'p': hex(self.p), 'max_value': self.max_value}
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            self.keys.tofile(f)
+    
+    @classmethod
+    def load(cls, path, g=None, p=None):
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            table_g = int(header['g'], 16)
+            table_p = int(header['p'], 16)
+            if (g is not None and g != table_g) or (p is not None and p != table_p):
+                raise ValueError("离散对数表与当前群参数不一致")
+            keys = array('Q')
+            keys.frombytes(f.read())
+        table = cls(table_g, table_p, header['max_value'], keys)
+        if len(keys) != table.step:
+            raise ValueError("离散对数表文件不完整")
+        return table
+
 
 class DDHProtocol:
     """简化的DDH协议实现"""
     
-    def __init__(self):
-        # 使用更大的素数用于演示
-        self.p = 101  # 更大的素数
-        self.g = 2  # 生成元
-        self.private_key = random.randint(2, self.p - 2)
-        self.public_key = pow(self.g, self.private_key, self.p)
+    def __init__(self, group=None, window=6, verbose=True, public_key=None):
+        """public_key不为None时只持有对方的公钥，可加密和做同态运算但不能解密"""
+        self.group = group
+        if group is None:
+            # 演示用的小素数
+            self.p = 101
+            self.g = 2  # 生成元
+            exponent_bits = (self.p - 2).bit_length()
+        else:
+            self.p = group.p
+            self.g = group.g
+            exponent_bits = group.exponent_bits or group.q.bit_length()
+        if public_key is None:
+            self.private_key = self.random_exponent()
+            self.public_key = pow(self.g, self.private_key, self.p)
+        else:
+            self.private_key = None
+            self.public_key = public_key
+        
+        # g和公钥在整个会话中固定，预计算窗口表后每次加密只需查表相乘
+        self.g_table = FixedBaseTable(self.g, self.p, exponent_bits, window)
+        self.public_table = FixedBaseTable(self.public_key, self.p, exponent_bits, window)
         
-        print(f"协议初始化: p={self.p}, g={self.g}")
-        print(f"公钥: {self.public_key}, 私钥: {self.private_key}")
+        if not verbose:
+            return
+        if group is None:
+            print(f"协议初始化: p={self.p}, g={self.g}")
+            print(f"公钥: {self.public_key}, 私钥: {self.private_key}")
+        else:
+            print(f"协议初始化: {self.p.bit_length()}位安全素数群, g={self.g}")
+    
+    def random_exponent(self):
+        if self.group is None:
+            return random.randint(2, self.p - 2)
+        return self.group.random_exponent()
     
     def encrypt(self, message):
         """ElGamal加密"""
         # 确保消息在有效范围内
         message = message % self.p
-        k = random.randint(2, self.p - 2)
-        c1 = pow(self.g, k, self.p)
-        c2 = (message * pow(self.public_key, k, self.p)) % self.p
+        k = self.random_exponent()
+        c1 = self.g_table.pow(k)
+        c2 = (message * self.public_table.pow(k)) % self.p
         return c1, c2
     
+    def encrypt_many(self, messages):
+        """批量ElGamal加密，所有消息共用同一组预计算表"""
+        return [self.encrypt(message) for message in messages]
+    
     def decrypt(self, ciphertext):
         """ElGamal解密"""
         c1, c2 = ciphertext
         s = pow(c1, self.private_key, self.p)
         s_inv = pow(s, -1, self.p)
         return (c2 * s_inv) % self.p
+    
+    def public_copy(self):
+        """不含私钥的副本，可交给对方用于加密和同态运算"""
+        other = DDHProtocol.__new__(DDHProtocol)
+        other.__dict__.update(self.__dict__)
+        other.private_key = None
+        return other
+    
+    def encrypt_exponent(self, value):
+        """指数ElGamal加密: (g^k, g^value * y^k)，密文相乘即明文相加"""
+        if value < 0:
+            raise ValueError(f"指数ElGamal只支持非负整数: {value}")
+        k = self.random_exponent()
+        c1 = self.g_table.pow(k)
+        if value.bit_length() <= self.g_table.max_bits:
+            g_value = self.g_table.pow(value)
+        else:
+            g_value = pow(self.g, value, self.p)
+        c2 = (g_value * self.public_table.pow(k)) % self.p
+        return c1, c2
+    
+    def encrypt_exponent_many(self, values):
+        """批量指数ElGamal加密"""
+        return [self.encrypt_exponent(value) for value in values]
+    
+    def aggregate(self, ciphertexts):
+        """同态相加: 逐分量相乘"""
+        c1, c2 = 1, 1
+        for a, b in ciphertexts:
+            c1 = c1 * a % self.p
+            c2 = c2 * b % self.p
+        return c1, c2
+    
+    def decrypt_exponent(self, ciphertext, table):
+        """解密得到 g^m 后用离散对数表求m"""
+        value = table.solve(self.decrypt(ciphertext))
+        if value is None:
+            raise ValueError(f"明文超出离散对数表范围: 最大 {table.max_value}")
+        return value
 
 
-def run_protocol(data1, data2):
-    """运行私密交集求和协议"""
+def run_protocol(data1, data2, engine=None, dlog_table=None, verify=False):
+    """运行私密交集求和协议，dlog_table为解密总和用的离散对数表，需覆盖总和的取值范围
+    
+    verify=True时用明文交集校验结果，只用于演示和测试: 大规模数据上会重建明文交集
+    """
     print("\n" + "="*50)
     print("开始运行DDH私密交集求和协议")
     print("="*50)
     
-    # 初始化协议
-    protocol = DDHProtocol()
+    # 初始化协议引擎
+    engine = engine if engine is not None else PSISumEngine()
+    print(f"群: {engine.group.p.bit_length()}位安全素数群, 指数位数: {engine.group.exponent_bits or '全长'}")
+    print(f"工作进程数: {engine.workers}")
     
-    print(f"P1数据: {data1}")
-    print(f"P2数据: {data2}")
+    if dlog_table is None:
+        dlog_table = DiscreteLogTable(engine.group.g, engine.group.p)
     
-    # 计算交集
-    intersection = set(data1.keys()) & set(data2.keys())
-    print(f"交集: {intersection}")
+    # 协议只输出交集大小和一方的值总和，两方的值分别作为值持有方各运行一次
+    # 值以指数ElGamal加密，P1将交集项的密文相乘后交给值持有方做一次解密
+    size, sum2 = private_intersection_sum(data1.keys(), data2, engine, dlog_table)
+    print(f"交集大小: {size}")
     
-    if not intersection:
+    if not size:
         print("没有交集")
         return
     
-    # 计算交集值的总和
-    total_sum = 0
-    for item in intersection:
-        total_sum += data1[item] + data2[item]
-    
-    print(f"交集值总和: {total_sum}")
+    _, sum1 = private_intersection_sum(data2.keys(), data1, engine, dlog_table)
+    total_sum = sum1 + sum2
+    print(f"P1交集值总和: {sum1}, P2交集值总和: {sum2}")
     
-    # 演示加密解密过程
-    print(f"\n加密解密演示:")
-    for item in intersection:
-        value1 = data1[item]
-        value2 = data2[item]
-        
-        # 加密
-        encrypted1 = protocol.encrypt(value1)
-        encrypted2 = protocol.encrypt(value2)
-        
-        # 解密
-        decrypted1 = protocol.decrypt(encrypted1)
-        decrypted2 = protocol.decrypt(encrypted2)
-        
-        print(f"项目 {item}:")
-        print(f"  P1值: {value1} -> 加密: {encrypted1} -> 解密: {decrypted1}")
-        print(f"  P2值: {value2} -> 加密: {encrypted2} -> 解密: {decrypted2}")
-        print(f"  验证: {'正确' if decrypted1 == value1 % protocol.p and decrypted2 == value2 % protocol.p else '错误'}")
+    if verify:
+        # 用明文结果校验协议输出
+        intersection = set(data1.keys()) & set(data2.keys())
+        expected = sum(data1[item] + data2[item] for item in intersection)
+        print(f"验证: {'正确' if total_sum == expected else '错误'}")
     
     print(f"\n协议执行完成，交集值总和: {total_sum}")
     return total_sum
 
 
+def benchmark_fixed_base(group=None, count=20):
+    """对比直接pow与固定基表的ElGamal加密耗时"""
+    import time
+    
+    protocol = DDHProtocol(group if group is not None else DDHGroup())
+    messages = [random.randint(1, protocol.p - 1) for _ in range(count)]
+    
+    start = time.perf_counter()
+    for message in messages:
+        k = protocol.random_exponent()
+        (pow(protocol.g, k, protocol.p), message * pow(protocol.public_key, k, protocol.p) % protocol.p)
+    direct = (time.perf_counter() - start) / count
+    
+    start = time.perf_counter()
+    ciphertexts = protocol.encrypt_many(messages)
+    table = (time.perf_counter() - start) / count
+    
+    correct = all(protocol.decrypt(c) == m for c, m in zip(ciphertexts, messages))
+    print(f"直接pow: {direct * 1000:.2f} ms/次, 固定基表: {table * 1000:.2f} ms/次, "
+          f"加速比: {direct / table:.1f}x, 解密{'正确' if correct else '错误'}")
+    return direct, table
+
+
+def benchmark_intersection(count=100000, overlap=0.5):
+    """对比Python set与DigestIndex在双重掩码元素上求交集的内存和耗时"""
+    import sys
+    import time
+    import tracemalloc
+    
+    group = DDHGroup()
+    own = [secrets.randbelow(group.p) for _ in range(count)]
+    shared = int(count * overlap)
+    theirs = own[:shared] + [secrets.randbelow(group.p) for _ in range(count - shared)]
+    random.shuffle(theirs)
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    own_set = set(own)
+    matched = [i for i, element in enumerate(theirs) if element in own_set]
+    set_time = time.perf_counter() - start
+    # set本身的开销加上其中保存的大整数
+    set_bytes = tracemalloc.get_traced_memory()[1] + sum(sys.getsizeof(element) for element in own)
+    tracemalloc.stop()
+    del own_set
+    
+    own_digests = np.array([element_digest(element, group.byte_length) for element in own], dtype=np.uint64)
+    their_digests = np.array([element_digest(element, group.byte_length) for element in theirs], dtype=np.uint64)
+    start = time.perf_counter()
+    index = DigestIndex(own_digests)
+    digest_matched = index.match(their_digests)
+    index_time = time.perf_counter() - start
+    
+    correct = sorted(matched) == digest_matched.tolist()
+    print(f"{count}个元素: set {set_bytes / count:.0f} 字节/元素, {set_time * 1000:.1f} ms; "
+          f"DigestIndex {index.nbytes / count:.0f} 字节/元素, {index_time * 1000:.1f} ms, "
+          f"结果{'一致' if correct else '不一致'}")
+    return set_bytes, index.nbytes
+
+
 def demo():
     """演示函数"""
     print("DDH私密交集求和协议演示")
@@ -95,8 +560,10 @@ def demo():
     # 示例数据 - 使用较小的数值
     data1 = {"A": 10, "B": 20, "C": 30}
     data2 = {"A": 5, "B": 15, "D": 40}
+    print(f"P1数据: {data1}")
+    print(f"P2数据: {data2}")
     
-    run_protocol(data1, data2)
+    run_protocol(data1, data2, verify=True)
 
 
 if __name__ == "__main__":
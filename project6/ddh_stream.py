@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DDH私密交集求和的两方流式运行器
+双方各为独立的asyncio端点，通过TCP或Unix套接字通信，各轮消息分块流水线传输:
+P1还在发送掩码标识符时，P2已经在对先到的块求幂；有界的在途任务数和 StreamWriter.drain 提供背压
+双方都不在内存中保存完整的交换集合，双重掩码元素只以排序的64位摘要数组保存
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import os
+import secrets
+import struct
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ddh import (DDHProtocol, DigestIndex, DiscreteLogTable, PSISumEngine,
+                 _digest_array_chunk, _init_worker, _mask_chunk, _mask_encrypt_chunk)
+
+# 消息头: 1字节类型 + 4字节长度
+HEADER = struct.Struct('>cI')
+MSG_PUBLIC_KEY = b'K'   # P2 -> P1: 指数ElGamal公钥
+MSG_MASKED = b'M'       # P1 -> P2: H(v)^k1 块
+MSG_MASKED_END = b'E'
+MSG_DIGESTS = b'Z'      # P2 -> P1: H(v)^(k1k2) 的摘要块，大端uint64
+MSG_DIGESTS_END = b'Y'
+MSG_PAIRS = b'P'        # P2 -> P1: (H(w)^k2, c1, c2) 块
+MSG_PAIRS_END = b'Q'
+MSG_TOTAL = b'S'        # P1 -> P2: 交集值总和的密文
+MSG_RESULT = b'R'       # P2 -> P1: 解密后的总和
+# P2每帧发送的摘要数为 chunk_size * DIGEST_FRAME_CHUNKS
+DIGEST_FRAME_CHUNKS = 32
+
+
+def max_frame_size(chunk_size, byte_length):
+    """单帧负载的上限: 摘要帧为 chunk_size*32 个uint64，记录帧为 chunk_size 条 (H(w)^k2, c1, c2)
+
+    长度字段来自网络，超过上限的帧直接拒绝，双方需使用相同的chunk_size
+    """
+    return max(chunk_size * DIGEST_FRAME_CHUNKS * 8, chunk_size * 3 * byte_length)
+
+
+async def send_message(writer, kind, payload=b''):
+    writer.write(HEADER.pack(kind, len(payload)))
+    writer.write(payload)
+    # 对端读得慢时在这里等待，发送方不会无限缓存
+    await writer.drain()
+
+
+async def receive_message(reader, expected=None, max_length=None):
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if expected is not None and kind not in expected:
+        raise ValueError(f"意外的消息类型: {kind!r}")
+    if max_length is not None and length > max_length:
+        raise ValueError(f"消息长度超出上限: {length} > {max_length}")
+    return kind, await reader.readexactly(length)
+
+
+def pack_integers(values, size):
+    return b''.join(value.to_bytes(size, 'big') for value in values)
+
+
+def unpack_integers(payload, size, fields=1):
+    # 负载必须恰好由整条记录组成，否则会拼出截断的整数或不完整的记录
+    if len(payload) % (size * fields):
+        raise ValueError(f"消息长度 {len(payload)} 不是 {size * fields} 字节的整数倍")
+    return [int.from_bytes(payload[i:i + size], 'big') for i in range(0, len(payload), size)]
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def iterate(iterable):
+    for item in iterable:
+        yield item
+
+
+async def compute_stream(executor, func, chunks, args, max_in_flight):
+    """chunks为产出 (块, 附带数据) 的异步迭代器，按顺序产出 (func(块, *args), 附带数据)
+
+    同时在进程池中计算的块数不超过max_in_flight，超过后暂停读取输入
+    """
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    async for chunk, context in chunks:
+        pending.append((loop.run_in_executor(executor, func, chunk, *args), context))
+        if len(pending) >= max_in_flight:
+            future, context = pending.popleft()
+            yield await future, context
+    while pending:
+        future, context = pending.popleft()
+        yield await future, context
+
+
+async def receive_chunks(reader, kind, end_kind, size, max_length, fields=1):
+    """逐块接收整数数组，fields>1时每条记录由多个整数组成"""
+    while True:
+        received, payload = await receive_message(reader, (kind, end_kind), max_length)
+        if received == end_kind:
+            return
+        values = unpack_integers(payload, size, fields)
+        if fields == 1:
+            yield values, None
+        else:
+            yield [tuple(values[i:i + fields]) for i in range(0, len(values), fields)], None
+
+
+class IndexPermutation:
+    """[0, size) 上的带密钥伪随机置换: 以BLAKE2b为轮函数的4轮Feistel网络，超出范围时循环行走
+
+    按顺序遍历产出打乱后的下标，只保存密钥，不需要与size成正比的内存
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size, key=None):
+        self.size = size
+        self.key = key if key is not None else secrets.token_bytes(32)
+        # 两半各half位，定义域 2^(2*half) 不超过size的4倍，循环行走的平均次数有界
+        self.half = (max(1, (size - 1).bit_length()) + 1) // 2
+        self.mask = (1 << self.half) - 1
+
+    def __len__(self):
+        return self.size
+
+    def _round(self, index, value):
+        digest = hashlib.blake2b(bytes([index]) + value.to_bytes(8, 'big'), key=self.key, digest_size=8).digest()
+        return int.from_bytes(digest, 'big') & self.mask
+
+    def _permute(self, value):
+        left, right = value >> self.half, value & self.mask
+        for index in range(self.ROUNDS):
+            left, right = right, left ^ self._round(index, right)
+        return (left << self.half) | right
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"下标超出置换范围: {index}")
+        value = self._permute(index)
+        while value >= self.size:
+            value = self._permute(value)
+        return value
+
+    def __iter__(self):
+        return (self[index] for index in range(self.size))
+
+
+class StreamingParty1:
+    """P1端点: 持有标识符，流式发送掩码并在收到的P2记录上逐块求交集和同态求和"""
+
+    def __init__(self, identifiers, engine=None, chunk_size=256, max_in_flight=None):
+        self.identifiers = identifiers
+        self.engine = engine if engine is not None else PSISumEngine()
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight or 2 * self.engine.workers
+        self.max_frame = max_frame_size(chunk_size, self.engine.group.byte_length)
+        self.key = self.engine.group.random_exponent()
+
+    async def _send_masked(self, writer, executor):
+        group = self.engine.group
+        chunks = iterate((chunk, None) for chunk in chunked(self.identifiers, self.chunk_size))
+        async for masked, _ in compute_stream(executor, _mask_chunk, chunks, (group, self.key),
+                                              self.max_in_flight):
+            await send_message(writer, MSG_MASKED, pack_integers(masked, group.byte_length))
+        await send_message(writer, MSG_MASKED_END)
+
+    async def run(self, reader, writer):
+        """返回 (交集大小, 交集值总和)"""
+        group = self.engine.group
+        size = group.byte_length
+        _, payload = await receive_message(reader, (MSG_PUBLIC_KEY,), size)
+        protocol = DDHProtocol(group, verbose=False, public_key=int.from_bytes(payload, 'big'))
+
+        with ProcessPoolExecutor(max_workers=self.engine.workers) as executor:
+            # 发送与接收并发进行
+            sender = asyncio.create_task(self._send_masked(writer, executor))
+
+            chunks = []
+            while True:
+                kind, payload = await receive_message(reader, (MSG_DIGESTS, MSG_DIGESTS_END), self.max_frame)
+                if kind == MSG_DIGESTS_END:
+                    break
+                if len(payload) % 8:
+                    raise ValueError(f"摘要消息长度 {len(payload)} 不是8字节的整数倍")
+                chunks.append(np.frombuffer(payload, dtype='>u8').astype(np.uint64))
+            own = DigestIndex(np.concatenate(chunks) if chunks else [])
+            del chunks
+            await sender
+
+            # P2的记录逐块求 H(w)^(k2k1) 的摘要，命中的密文立即累乘，不保留整个集合
+            count = 0
+            total = protocol.encrypt_exponent(0)
+            pairs = receive_chunks(reader, MSG_PAIRS, MSG_PAIRS_END, size, self.max_frame, fields=3)
+            chunks = (([record[0] for record in records], records) async for records, _ in pairs)
+            async for digests, records in compute_stream(executor, _digest_array_chunk, chunks, (group, self.key),
+                                                         self.max_in_flight):
+                matched = [records[i][1:] for i in own.match(digests)]
+                count += len(matched)
+                total = protocol.aggregate([total] + matched)
+
+        await send_message(writer, MSG_TOTAL, pack_integers(total, size))
+        _, payload = await receive_message(reader, (MSG_RESULT,), self.max_frame)
+        return count, int.from_bytes(payload, 'big')
+
+
+class StreamingParty2:
+    """P2端点: 持有 (标识符, 值)，解密最终的交集值总和
+
+    记录按带密钥的伪随机置换顺序发送，items需支持随机访问，迭代器会先读入列表
+    """
+
+    def __init__(self, items, engine=None, chunk_size=256, max_in_flight=None, dlog_table=None):
+        self.items = items if isinstance(items, Sequence) else list(items)
+        self.engine = engine if engine is not None else PSISumEngine()
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight or 2 * self.engine.workers
+        self.max_frame = max_frame_size(chunk_size, self.engine.group.byte_length)
+        self.key = self.engine.group.random_exponent()
+        self.protocol = DDHProtocol(self.engine.group, verbose=False)
+        self.dlog_table = dlog_table
+
+    async def _double_mask(self, reader, executor):
+        # 对P1的块求幂，只保留64位摘要；排序后的顺序与P1的发送顺序无关，与打乱的效果相同
+        group = self.engine.group
+        digests = []
+        chunks = receive_chunks(reader, MSG_MASKED, MSG_MASKED_END, group.byte_length, self.max_frame)
+        async for chunk_digests, _ in compute_stream(executor, _digest_array_chunk, chunks, (group, self.key),
+                                                     self.max_in_flight):
+            digests.append(chunk_digests)
+        return np.sort(np.concatenate(digests)) if digests else np.empty(0, dtype=np.uint64)
+
+    async def _mask_own(self, executor, queue):
+        # 与接收P1的块并发计算自己的记录，队列有界，发送跟不上时暂停计算
+        # P1逐块统计命中数，若按输入顺序发送，P1可据此推断交集记录在P2输入中的位置；
+        # 按整个集合上的伪随机置换取记录，每块都是全体记录的随机样本
+        group = self.engine.group
+        order = (self.items[index] for index in IndexPermutation(len(self.items)))
+        chunks = iterate((chunk, None) for chunk in chunked(order, self.chunk_size))
+        async for records, _ in compute_stream(executor, _mask_encrypt_chunk, chunks, (group, self.key),
+                                               self.max_in_flight):
+            await queue.put(records)
+        await queue.put(None)
+
+    async def run(self, reader, writer):
+        """返回交集值总和"""
+        group = self.engine.group
+        size = group.byte_length
+        await send_message(writer, MSG_PUBLIC_KEY, self.protocol.public_key.to_bytes(size, 'big'))
+
+        queue = asyncio.Queue(maxsize=self.max_in_flight)
+        # 公钥及其窗口表在每个工作进程启动时安装一次，不随每块重新发送
+        with ProcessPoolExecutor(max_workers=self.engine.workers, initializer=_init_worker,
+                                 initargs=(self.protocol.public_copy(),)) as executor:
+            producer = asyncio.create_task(self._mask_own(executor, queue))
+
+            digests = await self._double_mask(reader, executor)
+            frame = self.chunk_size * DIGEST_FRAME_CHUNKS
+            for start in range(0, len(digests), frame):
+                await send_message(writer, MSG_DIGESTS, digests[start:start + frame].astype('>u8').tobytes())
+            await send_message(writer, MSG_DIGESTS_END)
+            del digests
+
+            while True:
+                records = await queue.get()
+                if records is None:
+                    break
+                await send_message(writer, MSG_PAIRS, pack_integers(
+                    [value for record in records for value in record], size))
+            await send_message(writer, MSG_PAIRS_END)
+            await producer
+
+        _, payload = await receive_message(reader, (MSG_TOTAL,), 2 * size)
+        c1, c2 = unpack_integers(payload, size, fields=2)
+        if self.dlog_table is None:
+            self.dlog_table = DiscreteLogTable(self.protocol.g, self.protocol.p)
+        total_sum = self.protocol.decrypt_exponent((c1, c2), self.dlog_table)
+        result = total_sum.to_bytes((total_sum.bit_length() + 7) // 8 or 1, 'big')
+        await send_message(writer, MSG_RESULT, result)
+        return total_sum
+
+
+def parse_address(address):
+    """host:port 或 [IPv6]:port 为TCP地址，unix:/path 为Unix套接字"""
+    if address.startswith('unix:'):
+        return ('unix', address[len('unix:'):])
+    host, _, port = address.rpartition(':')
+    # IPv6地址写作 [::1]:9757，去掉方括号
+    if host.startswith('[') and host.endswith(']'):
+        host = host[1:-1]
+    return ('tcp', (host or '127.0.0.1', int(port)))
+
+
+async def serve_party2(party, address):
+    """P2监听地址，处理一个P1连接后返回交集值总和
+
+    只接受第一个连接作为P1，随即停止监听；此后到达的连接直接关闭，不影响正在运行的协议
+    """
+    done = asyncio.get_running_loop().create_future()
+    peer = None
+
+    async def handle(reader, writer):
+        nonlocal peer
+        if peer is not None:
+            writer.close()
+            return
+        peer = writer
+        server.close()
+        try:
+            done.set_result(await party.run(reader, writer))
+        except Exception as e:
+            done.set_exception(e)
+        finally:
+            writer.close()
+
+    kind, target = parse_address(address)
+    if kind == 'unix':
+        server = await asyncio.start_unix_server(handle, path=target)
+    else:
+        server = await asyncio.start_server(handle, *target)
+    try:
+        async with server:
+            return await done
+    finally:
+        if kind == 'unix' and os.path.exists(target):
+            os.unlink(target)
+
+
+async def connect_party1(party, address, retries=50):
+    """P1连接到P2，返回 (交集大小, 交集值总和)"""
+    kind, target = parse_address(address)
+    for attempt in range(retries):
+        try:
+            if kind == 'unix':
+                reader, writer = await asyncio.open_unix_connection(target)
+            else:
+                reader, writer = await asyncio.open_connection(*target)
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            if attempt == retries - 1:
+                raise
+            await asyncio.sleep(0.1)
+    try:
+        return await party.run(reader, writer)
+    finally:
+        writer.close()
+
+
+async def run_local(identifiers, items, address='127.0.0.1:9757', engine=None, chunk_size=256):
+    """在同一进程中启动两个端点并通过本地套接字运行协议"""
+    engine = engine if engine is not None else PSISumEngine()
+    party2 = StreamingParty2(items, engine, chunk_size)
+    party1 = StreamingParty1(identifiers, engine, chunk_size)
+    server = asyncio.create_task(serve_party2(party2, address))
+    (size, total_sum), _ = await asyncio.gather(connect_party1(party1, address), server)
+    return size, total_sum
+
+
+def read_identifiers(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if row:
+                yield row[0]
+
+
+def read_items(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if row:
+                yield row[0], int(row[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DDH私密交集求和的两方流式运行器')
+    parser.add_argument('role', choices=['party1', 'party2', 'demo'])
+    parser.add_argument('--address', default='127.0.0.1:9757', help='host:port、[IPv6]:port 或 unix:/path')
+    parser.add_argument('--input', help='party1: 每行一个标识符的CSV；party2: 每行 标识符,值 的CSV')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=256, help='双方必须一致，同时决定接收帧的长度上限')
+    parser.add_argument('--max-sum', type=int, default=1 << 20, help='P2解密时离散对数表覆盖的总和上限')
+    args = parser.parse_args()
+
+    engine = PSISumEngine(workers=args.workers)
+    if args.role == 'party1':
+        party = StreamingParty1(read_identifiers(args.input), engine, args.chunk_size)
+        size, total_sum = asyncio.run(connect_party1(party, args.address))
+        print(f"交集大小: {size}, 交集值总和: {total_sum}")
+    elif args.role == 'party2':
+        table = DiscreteLogTable(engine.group.g, engine.group.p, args.max_sum)
+        party = StreamingParty2(read_items(args.input), engine, args.chunk_size, dlog_table=table)
+        print(f"交集值总和: {asyncio.run(serve_party2(party, args.address))}")
+    else:
+        data1 = {"A": 10, "B": 20, "C": 30}
+        data2 = {"A": 5, "B": 15, "D": 40}
+        size, total_sum = asyncio.run(run_local(data1.keys(), data2.items(), args.address, engine))
+        print(f"交集大小: {size}, P2交集值总和: {total_sum}")
+
+
+if __name__ == "__main__":
+    main()